@@ -0,0 +1,80 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("make-synthetic-organization")
+@click.option("--company", required=True, help="Existing company to create the organisation in")
+@click.option("--departments", default=10, show_default=True, help="Number of departments")
+@click.option("--employees-per-department", default=100, show_default=True, help="Employees in each department")
+@click.option("--leave-type", default="Casual Leave", show_default=True, help="Leave Type to allocate")
+@click.option("--leaves", default=14.0, show_default=True, help="Leaves allocated per employee")
+@click.option("--year", type=int, help="Year for holidays and allocations [default: current year]")
+@click.option("--prefix", default="SYN", show_default=True, help="Prefix for all generated names")
+@click.option("--seed", type=int, help="Random seed for a reproducible organisation")
+@pass_context
+def make_synthetic_organization(
+	context, company, departments, employees_per_department, leave_type, leaves, year, prefix, seed
+):
+	"""Bulk-create a synthetic organisation for attendance generator benchmarks"""
+	from compliance.synthetic_data import create_synthetic_organization
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		counts = create_synthetic_organization(
+			company,
+			departments=departments,
+			employees_per_department=employees_per_department,
+			leave_type=leave_type,
+			leaves_per_employee=leaves,
+			year=year,
+			prefix=prefix,
+			seed=seed,
+		)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	for doctype, count in counts.items():
+		click.echo(f"{doctype}: {count}")
+
+
+@click.command("export-device-logs")
+@click.option("--company", required=True, help="Company whose Attendance Logs are exported")
+@click.option("--from-date", required=True, help="First attendance date (YYYY-MM-DD)")
+@click.option("--to-date", required=True, help="Last attendance date (YYYY-MM-DD)")
+@click.option("--department", help="Only export this department")
+@click.option("--compress", is_flag=True, default=False, help="Gzip the output files")
+@click.option("--split-by-branch", is_flag=True, default=False, help="Write one file per employee branch")
+@click.option("--output-dir", help="Target folder [default: private/files/device_exports]")
+@pass_context
+def export_device_logs(context, company, from_date, to_date, department, compress, split_by_branch, output_dir):
+	"""Stream Attendance Logs to biometric device dump files"""
+	from compliance.device_export import export_device_logs
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		files = export_device_logs(
+			company,
+			from_date,
+			to_date,
+			department=department,
+			compress=compress,
+			split_by_branch=split_by_branch,
+			output_dir=output_dir,
+		)
+	finally:
+		frappe.destroy()
+
+	for path, lines in files.items():
+		click.echo(f"{path}: {lines} lines")
+
+
+commands = [make_synthetic_organization, export_device_logs]
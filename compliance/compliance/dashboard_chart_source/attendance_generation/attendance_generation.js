@@ -0,0 +1,9 @@
+// Copyright (c) 2025, Compliance and contributors
+// For license information, please see license.txt
+
+frappe.provide("frappe.dashboards.chart_sources");
+
+frappe.dashboards.chart_sources["Attendance Generation"] = {
+	method: "compliance.compliance.dashboard_chart_source.attendance_generation.attendance_generation.get",
+	filters: [],
+};
@@ -0,0 +1,25 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import frappe
+
+from compliance.dashboard import get_stat
+
+
+@frappe.whitelist()
+def get(
+	chart_name=None,
+	chart=None,
+	no_cache=None,
+	filters=None,
+	from_date=None,
+	to_date=None,
+	timespan=None,
+	time_interval=None,
+	heatmap_year=None,
+):
+	"""Attendance Logs per day over the last 30 days, from the cached workspace aggregates"""
+	return {
+		"labels": get_stat("chart_labels") or [],
+		"datasets": [{"name": "Attendance Logs", "values": get_stat("chart_values") or []}],
+	}
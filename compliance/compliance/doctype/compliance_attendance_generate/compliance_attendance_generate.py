@@ -1,8 +1,25 @@
 import frappe
 import random
+from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate, add_days
-from datetime import time
+from frappe.utils import getdate, add_days, cint, date_diff
+
+from compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator import (
+    DEPT_CONFIG_FIELDS,
+    EMPLOYEE_FIELDS,
+    DayPlan,
+    _bulk_upsert_daily_rows,
+    _create_employee_attendance_fast,
+    _default_cfg,
+    _minute_to_time,
+    _time_windows,
+)
+from compliance.compliance.report.compliance_attendance_summary.compliance_attendance_summary import (
+    clear_summary_cache,
+)
+from compliance.dashboard import refresh_workspace_stats
+from compliance.run_locks import acquire_attendance_lock, release_lock
+from compliance.utils import get_daily_attendance_doctype
 
 class ComplianceAttendanceGenerate(Document):
     @frappe.whitelist()
@@ -31,55 +48,147 @@ class ComplianceAttendanceGenerate(Document):
 
     @frappe.whitelist()
     def generate_attendance(self):
-        # Loop through all the employees in the child table
-        for employee_data in self.employee:
-            employee = employee_data.employee
-            from_date = getdate(self.from_date)
-            to_date = getdate(self.to_date)
-
-            # Check for the attendance already existing for these dates
-            attendance_exists = frappe.db.exists("Employee Attendance", {
-                'employee': employee,
-                'attendance_date': ('between', [from_date, to_date])
-            })
-
-            # If attendance does not exist, create new attendance records
-            if not attendance_exists:
-                # Create a new Employee Attendance record
-                attendance = frappe.get_doc({
-                    "doctype": "Employee Attendance",
-                    "employee": employee,
-                    "month": from_date.strftime('%B'),  # Use the month from the from_date
-                    "year": from_date.year,  # Use the year from the from_date
-                })
+        # Refuse to run while an overlapping generation run holds the lock
+        acquire_attendance_lock(self)
+        try:
+            self._generate_attendance()
+        except Exception:
+            # release_lock commits, which must not keep a half-written run
+            frappe.db.rollback()
+            raise
+        finally:
+            release_lock(self.doctype, self.name)
+
+    def _generate_attendance(self):
+        """
+        Generate Employee Attendance rows from the per-employee targets in the
+        `employee` table.
+
+        Every employee gets exactly `absent` absent days, `late` late arrivals
+        and `early` early exits, at random days of the range, with times from
+        the employee's Department Attendance Config windows. All schedules are
+        planned in one pass and written with bulk child-row upserts.
+        Employees that already have rows in the range are skipped.
+        """
+        from_date = getdate(self.from_date)
+        to_date = getdate(self.to_date)
+        dates = [add_days(from_date, offset) for offset in range(date_diff(to_date, from_date) + 1)]
+        targets = {row.employee: row for row in self.employee if row.employee}
+        if not dates or not targets:
+            return
+
+        employees = frappe.get_all(
+            "Employee", filters={"name": ["in", list(targets)]}, fields=[*EMPLOYEE_FIELDS, "company"]
+        )
+        existing = _get_employees_with_rows([emp.name for emp in employees], from_date, to_date)
+        dept_configs = {
+            cfg.department: cfg
+            for cfg in frappe.get_all(
+                "Department Attendance Config", filters={"is_active": 1}, fields=DEPT_CONFIG_FIELDS
+            )
+        }
+
+        # Plan every employee first, then write all rows together
+        windows = {}
+        plans = {}
+        for emp in employees:
+            if emp.name in existing:
+                continue
+            if emp.department not in windows:
+                windows[emp.department] = _time_windows(
+                    dept_configs.get(emp.department) or _default_cfg(), include_overtime=False
+                )
+            plans[emp.name] = _plan_exact_days(dates, targets[emp.name], windows[emp.department])
+
+        parents = _get_employee_attendance_names(list(plans), dates)
+        days_by_parent = {}
+        # Document creation logs every step; keep it out of the user's dialog
+        frappe.flags.mute_messages = True
+        try:
+            for emp in employees:
+                for day in plans.get(emp.name, ()):
+                    key = (emp.name, day.date.strftime("%B"), day.date.year)
+                    if key not in parents:
+                        parents[key] = _create_employee_attendance_fast(frappe._dict(company=emp.company), emp, key[1], key[2])
+                    if parents[key]:
+                        days_by_parent.setdefault(parents[key], []).append(day)
+        finally:
+            frappe.flags.mute_messages = False
+
+        _bulk_upsert_daily_rows(days_by_parent)
+        for company in {emp.company for emp in employees if emp.name in plans}:
+            clear_summary_cache(company)
+        refresh_workspace_stats()
+
+        frappe.msgprint(
+            _("Generated attendance for {0} employees, skipped {1} that already have attendance in this range").format(
+                len(plans), len(existing)
+            )
+        )
+
+
+def _plan_exact_days(dates, target, time_windows):
+    """
+    Plan `dates` for one employee with exactly the target's absent, late and
+    early counts (capped at the days available), picked with random.sample.
+    """
+    check_in, check_out = time_windows
+    # Components of _time_windows: check-in (on time, late), check-out (early, overtime, normal)
+    on_time, late = check_in[0], check_in[1]
+    early, normal = check_out[0], check_out[-1]
+
+    absent_days = set(random.sample(range(len(dates)), min(cint(target.absent), len(dates))))
+    present_days = [index for index in range(len(dates)) if index not in absent_days]
+    late_days = set(random.sample(present_days, min(cint(target.late), len(present_days))))
+    early_days = set(random.sample(present_days, min(cint(target.early), len(present_days))))
+
+    plan = []
+    for index, date in enumerate(dates):
+        if index in absent_days:
+            plan.append(DayPlan(date, None, None, True))
+            continue
+
+        check_in_minute = random.randint(*(late if index in late_days else on_time)[1:])
+        check_out_minute = random.randint(*(early if index in early_days else normal)[1:])
+        plan.append(DayPlan(date, _minute_to_time(check_in_minute), _minute_to_time(check_out_minute), False))
+
+    return plan
+
+
+def _get_employees_with_rows(employees, from_date, to_date):
+    """Employees with at least one Employee Attendance row in the range, in one query"""
+    if not employees:
+        return set()
+
+    return set(
+        frappe.db.sql_list(
+            f"""
+            SELECT DISTINCT attendance.employee
+            FROM `tab{get_daily_attendance_doctype()}` row
+            JOIN `tabEmployee Attendance` attendance ON attendance.name = row.parent
+            WHERE attendance.employee IN %(employees)s
+                AND row.date BETWEEN %(from_date)s AND %(to_date)s
+            """,
+            {"employees": employees, "from_date": from_date, "to_date": to_date},
+        )
+    )
+
+
+def _get_employee_attendance_names(employees, dates):
+    """Return {(employee, month name, year): Employee Attendance name} for the planned months"""
+    if not employees:
+        return {}
 
-                # Loop through each day from from_date to to_date and add rows to 'table1'
-                current_date = from_date
-                while current_date <= to_date:
-                    # Generate random check-in and check-out times
-                    check_in_hour = random.randint(9, 9)  # Random hour between 8 and 10 AM
-                    check_in_minute = random.randint(0, 15)
-                    check_in_second = random.randint(0, 59)
-                    check_in_1 = time(check_in_hour, check_in_minute, check_in_second)
-                    check_in_1_str = check_in_1.strftime("%H:%M:%S")  # Convert to string
-                    
-                    check_out_hour = random.randint(19, 19)  # Random hour between 5 and 7 PM
-                    check_out_minute = random.randint(0, 15)
-                    check_out_second = random.randint(0, 59)
-                    check_out_1 = time(check_out_hour, check_out_minute, check_out_second)  # Random check-out time
-
-                    # Add a row to the 'table1' child table with the current date and random check-in/check-out
-                    attendance.append("table1", {
-                        "date": current_date,  # Correct field name 'date'
-                        "status": "Present",  # Default status
-                        "check_in_1": check_in_1_str,  # Use the generated random check-in time string
-                        "check_out_1": check_out_1.strftime("%H:%M:%S"),  # Use the generated random check-out time string
-                    })
-
-                    # Move to the next date
-                    current_date = add_days(current_date, 1)
-
-                # Insert the Employee Attendance record with the child table data
-                attendance.insert()
-
-        # No need to manually commit as Frappe handles transaction commit
+    months = {(date.strftime("%B"), date.year) for date in dates}
+    return {
+        (row.employee, row.month, cint(row.year)): row.name
+        for row in frappe.get_all(
+            "Employee Attendance",
+            filters={
+                "employee": ["in", employees],
+                "month": ["in", [month for month, _year in months]],
+                "year": ["in", list({year for _month, year in months})],
+            },
+            fields=["name", "employee", "month", "year"],
+        )
+    }
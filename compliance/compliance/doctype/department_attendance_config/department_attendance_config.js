@@ -1,8 +1,44 @@
 // Copyright (c) 2025, mohtashi and contributors
 // For license information, please see license.txt
 
-// frappe.ui.form.on("Department Attendance Config", {
-// 	refresh(frm) {
+frappe.ui.form.on("Department Attendance Config", {
+	refresh(frm) {
+		frm.add_custom_button(__("Simulate Month"), function() {
+			frm.call({
+				method: "simulate",
+				doc: frm.doc,
+				callback: function(r) {
+					if (r.message) {
+						show_simulation(r.message);
+					}
+				}
+			});
+		});
+	},
+});
 
-// 	},
-// });
+function show_simulation(result) {
+	const rows = [
+		[__("Working Hours"), result.monthly_hours],
+		[__("Overtime Hours"), result.overtime_hours],
+		[__("Late Days"), result.late_days],
+		[__("Absent Days"), result.absent_days],
+		[__("Overtime Days"), result.overtime_days]
+	];
+
+	let html = `<p>${__("Per employee-month over {0} working days, {1} hours per present day on average.", [result.working_days, result.daily_hours])}</p>`;
+	html += `<table class="table table-bordered">
+		<thead><tr>
+			<th></th><th>${__("Expected")}</th><th>P10</th><th>P50</th><th>P90</th>
+		</tr></thead><tbody>`;
+	rows.forEach(function([label, summary]) {
+		html += `<tr><td>${label}</td><td>${summary.expected}</td><td>${summary.p10}</td><td>${summary.p50}</td><td>${summary.p90}</td></tr>`;
+	});
+	html += "</tbody></table>";
+
+	frappe.msgprint({
+		title: __("Simulated Month"),
+		message: html,
+		wide: true
+	});
+}
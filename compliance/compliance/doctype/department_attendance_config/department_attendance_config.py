@@ -4,6 +4,9 @@
 import frappe
 from frappe.model.document import Document
 
+from compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator import _probability, _time_windows
+from compliance.shifts import get_shift_timings
+
 class DepartmentAttendanceConfig(Document):
 	def validate(self):
 		self._validate_probability_fields()
@@ -56,3 +59,110 @@ class DepartmentAttendanceConfig(Document):
 		# Ensure check-in end is before check-out start
 		if check_in_end >= check_out_start:
 			frappe.throw("Check-in end time should be before check-out start time")
+	
+	@frappe.whitelist()
+	def simulate(self, working_days=None):
+		"""
+		What-if preview of a month generated with this (possibly unsaved) config.
+		
+		Uses the generator's own time model: the exact per-day distribution of
+		worked minutes is built by convolving the check-in and check-out
+		mixtures, and monthly totals use the normal approximation over the
+		working days. Nothing is written to the database.
+		
+		Args:
+			working_days (int): working days per month, defaults to the weekdays of the current month
+		"""
+		from frappe.utils import add_days, cint, flt, get_first_day, get_last_day, getdate
+		
+		self._validate_probability_fields()
+		self._validate_times()
+		
+		if not working_days:
+			first_day, last_day = get_first_day(getdate()), get_last_day(getdate())
+			working_days = sum(1 for offset in range((last_day - first_day).days + 1) if add_days(first_day, offset).weekday() < 5)
+		working_days = cint(working_days)
+		
+		shift = get_shift_timings([self.shift_type]).get(self.shift_type) if self.shift_type else None
+		check_in, check_out = _time_windows(self, shift=shift)
+		present = 1 - _probability(self.absent_probability)
+		late = _probability(self.late_arrival_probability)
+		threshold_minutes = flt(self.overtime_threshold_hours) * 60
+		
+		# Exact distribution of worked minutes on a present day
+		worked = {}
+		for in_minute, in_probability in _minute_pmf(check_in).items():
+			for out_minute, out_probability in _minute_pmf(check_out).items():
+				minutes = max(out_minute - in_minute, 0)
+				worked[minutes] = worked.get(minutes, 0) + in_probability * out_probability
+		
+		hours = _moments({minutes / 60: p for minutes, p in worked.items()})
+		overtime = _moments({max(minutes - threshold_minutes, 0) / 60: p for minutes, p in worked.items()})
+		overtime_day = sum(p for minutes, p in worked.items() if minutes > threshold_minutes)
+		
+		return {
+			"working_days": working_days,
+			"daily_hours": round(hours[0], 2),
+			"monthly_hours": _monthly_summary(working_days, present, hours),
+			"overtime_hours": _monthly_summary(working_days, present, overtime),
+			"absent_days": _binomial_summary(working_days, 1 - present),
+			"late_days": _binomial_summary(working_days, present * late),
+			"overtime_days": _binomial_summary(working_days, present * overtime_day),
+		}
+
+
+PERCENTILES = (10, 50, 90)
+
+
+def _minute_pmf(components):
+	"""Probability of each minute for a (probability, first, last) mixture"""
+	pmf = {}
+	for probability, first_minute, last_minute in components:
+		if probability <= 0:
+			continue
+		share = probability / (last_minute - first_minute + 1)
+		for minute in range(first_minute, last_minute + 1):
+			pmf[minute] = pmf.get(minute, 0) + share
+	return pmf
+
+
+def _moments(pmf):
+	mean = sum(value * p for value, p in pmf.items())
+	second = sum(value * value * p for value, p in pmf.items())
+	return mean, second
+
+
+def _monthly_summary(days, present, moments):
+	"""Mean and percentiles of a monthly sum of `days` independent present/absent days"""
+	from statistics import NormalDist
+	
+	mean_day, second_day = moments
+	mean = days * present * mean_day
+	variance = days * (present * second_day - (present * mean_day) ** 2)
+	
+	summary = {"expected": round(mean, 2)}
+	for percentile in PERCENTILES:
+		if variance > 0:
+			value = NormalDist(mean, variance ** 0.5).inv_cdf(percentile / 100)
+		else:
+			value = mean
+		summary[f"p{percentile}"] = round(max(value, 0), 2)
+	return summary
+
+
+def _binomial_summary(n, p):
+	"""Mean and exact percentiles of a Binomial(n, p) day count"""
+	from math import comb
+	
+	summary = {"expected": round(n * p, 2)}
+	cumulative = 0
+	k = 0
+	for percentile in PERCENTILES:
+		while k < n:
+			cumulative_k = cumulative + comb(n, k) * p ** k * (1 - p) ** (n - k)
+			if cumulative_k >= percentile / 100:
+				break
+			cumulative = cumulative_k
+			k += 1
+		summary[f"p{percentile}"] = k
+	return summary
@@ -12,11 +12,19 @@ frappe.ui.form.on('Fake Attendance Generator', {
 				},
 				callback: function(r) {
 					if (r.message && r.message.status === 'queued') {
-						frappe.msgprint({
-							title: __('Background Job Queued'),
-							message: __('The attendance generation has been queued as a background job. You can check the status using the "Check Status" button.'),
-							indicator: 'green'
-						});
+						if (r.message.blocked_by) {
+							frappe.msgprint({
+								title: __('Waiting For Overlapping Runs'),
+								message: __('Another run is generating attendance for an overlapping scope ({0}). This run will start automatically when it finishes.', [r.message.blocked_by.join(', ')]),
+								indicator: 'orange'
+							});
+						} else {
+							frappe.msgprint({
+								title: __('Background Job Queued'),
+								message: __('The attendance generation has been queued as a background job. You can check the status using the "Check Status" button.'),
+								indicator: 'green'
+							});
+						}
 						// Start polling for status updates
 						startStatusPolling(frm);
 					} else {
@@ -35,8 +43,8 @@ frappe.ui.form.on('Fake Attendance Generator', {
 			checkGenerationStatus(frm);
 		}, __('Actions'));
 
-		// Add Cancel Generation button (only show if running)
-		if (frm.doc.status === 'In Progress') {
+		// Add Cancel Generation button (only show if running or waiting)
+		if (['Queued', 'In Progress'].includes(frm.doc.status)) {
 			frm.add_custom_button(__('Cancel Generation'), function() {
 				frappe.confirm(
 					__('Are you sure you want to cancel the attendance generation?'),
@@ -54,6 +62,12 @@ frappe.ui.form.on('Fake Attendance Generator', {
 										indicator: 'orange'
 									});
 									frm.reload_doc();
+								} else if (r.message && r.message.status === 'cancelling') {
+									frappe.msgprint({
+										title: __('Cancelling'),
+										message: __('Attendance generation will stop after the current employee.'),
+										indicator: 'orange'
+									});
 								} else {
 									frappe.msgprint({
 										title: __('Error'),
@@ -68,6 +82,73 @@ frappe.ui.form.on('Fake Attendance Generator', {
 			}, __('Actions'));
 		}
 
+		// Add Reconcile button
+		frm.add_custom_button(__('Reconcile Logs'), function() {
+			frappe.prompt([
+				{
+					fieldname: 'fix',
+					fieldtype: 'Check',
+					label: __('Fix Mismatches'),
+					description: __('Rewrite Employee Attendance rows from the Attendance Logs')
+				}
+			], function(values) {
+				frappe.call({
+					method: 'compliance.reconciliation.enqueue_reconciliation',
+					args: {
+						company: frm.doc.company,
+						from_date: frm.doc.start_date,
+						to_date: frm.doc.end_date,
+						department: frm.doc.department,
+						fix: values.fix
+					},
+					callback: function(r) {
+						if (r.message && r.message.status === 'queued') {
+							frappe.show_alert({
+								message: __('Reconciliation queued. You will be notified when it finishes.'),
+								indicator: 'blue'
+							});
+						}
+					}
+				});
+			}, __('Reconcile Attendance Logs'), __('Start'));
+		}, __('Actions'));
+
+		// Add Export button
+		frm.add_custom_button(__('Export Device Logs'), function() {
+			frappe.prompt([
+				{
+					fieldname: 'compress',
+					fieldtype: 'Check',
+					label: __('Gzip Files')
+				},
+				{
+					fieldname: 'split_by_branch',
+					fieldtype: 'Check',
+					label: __('One File Per Branch')
+				}
+			], function(values) {
+				frappe.call({
+					method: 'compliance.device_export.enqueue_device_export',
+					args: {
+						company: frm.doc.company,
+						from_date: frm.doc.start_date,
+						to_date: frm.doc.end_date,
+						department: frm.doc.department,
+						compress: values.compress,
+						split_by_branch: values.split_by_branch
+					},
+					callback: function(r) {
+						if (r.message && r.message.status === 'queued') {
+							frappe.show_alert({
+								message: __('Export queued. You will be notified when the files are ready.'),
+								indicator: 'blue'
+							});
+						}
+					}
+				});
+			}, __('Export Device Logs'), __('Start'));
+		}, __('Actions'));
+
 		// Add View buttons
 		frm.add_custom_button(__('View Employee Attendance'), function() {
 			frappe.set_route('List', 'Employee Attendance');
@@ -81,6 +162,37 @@ frappe.ui.form.on('Fake Attendance Generator', {
 			frappe.set_route('List', 'Attendance Logs');
 		}, __('View'));
 
+		frm.add_custom_button(__('View Generation Runs'), function() {
+			frappe.set_route('List', 'Attendance Generation Run', {generator: frm.doc.name});
+		}, __('View'));
+
+		frm.add_custom_button(__('Check Database Indexes'), function() {
+			frappe.call({
+				method: 'compliance.indexes.check_indexes',
+				callback: function(r) {
+					const missing = r.message || [];
+					if (!missing.length) {
+						frappe.msgprint({
+							title: __('Database Indexes'),
+							message: __('All generator lookup indexes are present.'),
+							indicator: 'green'
+						});
+						return;
+					}
+
+					let message = __('Missing indexes (run bench migrate to add them):') + '<br>';
+					missing.forEach(function(index) {
+						message += `<br><strong>${index.doctype}</strong>: ${index.columns.join(', ')}`;
+					});
+					frappe.msgprint({
+						title: __('Database Indexes'),
+						message: message,
+						indicator: 'orange'
+					});
+				}
+			});
+		}, __('View'));
+
 		// Show status information
 		if (frm.doc.status && frm.doc.status !== 'Draft') {
 			showStatusInfo(frm);
@@ -97,6 +209,35 @@ frappe.ui.form.on('Fake Attendance Generator', {
 				frm.reload_doc();
 			}
 		});
+
+		frappe.realtime.off('device_export_completed');
+		frappe.realtime.on('device_export_completed', function(data) {
+			frappe.msgprint({
+				title: __('Export Completed'),
+				message: __('Wrote {0} lines to {1} in the device_exports private folder.', [data.lines, data.files.join(', ')]),
+				indicator: 'green'
+			});
+		});
+
+		frappe.realtime.off('attendance_reconciliation_completed');
+		frappe.realtime.on('attendance_reconciliation_completed', function(data) {
+			const issues = Object.keys(data.mismatches || {});
+			let message = __('Checked {0} employees.', [data.employees]);
+			if (issues.length) {
+				message += '<br>' + issues.map(issue => `${issue}: ${data.mismatches[issue]}`).join('<br>');
+				message += '<br>' + __('Rows fixed: {0}', [data.fixed]);
+				if ((data.blocked_by || []).length) {
+					message += '<br>' + __('Not fixed while {0} is running, try again later.', [data.blocked_by.join(', ')]);
+				}
+			} else {
+				message += '<br>' + __('No mismatches found.');
+			}
+			frappe.msgprint({
+				title: __('Reconciliation Completed'),
+				message: message,
+				indicator: issues.length ? 'orange' : 'green'
+			});
+		});
 	}
 });
 
@@ -133,12 +274,14 @@ function checkGenerationStatus(frm) {
 
 function showStatusInfo(frm) {
 	const statusColors = {
+		'Queued': 'yellow',
 		'In Progress': 'orange',
 		'Completed': 'green',
 		'Failed': 'red'
 	};
 
 	const statusMessages = {
+		'Queued': `Waiting for overlapping runs to finish: ${frm.doc.blocked_by || ''}`,
 		'In Progress': 'Background job is currently running.',
 		'Completed': 'Attendance generation completed successfully.',
 		'Failed': 'Attendance generation failed. Check the logs for details.'
@@ -167,6 +310,7 @@ function showStatusInfo(frm) {
 
 function getStatusIndicator(status) {
 	const indicators = {
+		'Queued': 'yellow',
 		'In Progress': 'orange',
 		'Completed': 'green',
 		'Failed': 'red'
@@ -5,9 +5,97 @@ import frappe
 from frappe import _
 from datetime import datetime, time, timedelta
 import random
-from frappe.utils import getdate, add_days, get_time
+from collections import namedtuple
+from contextlib import nullcontext
+from queue import Full, Queue
+from threading import Event, Thread
+from time import sleep
+from frappe.utils import getdate, add_days, get_time, cint, flt
 from frappe.model.document import Document
 
+from compliance.compliance.report.compliance_attendance_summary.compliance_attendance_summary import clear_summary_cache
+from compliance.dashboard import refresh_workspace_stats
+from compliance.indexes import is_natural_key_enforced
+from compliance.run_locks import STALE_LOCK_SECONDS, release_lock, schedule_generation
+from compliance.run_metrics import RunMetrics
+from compliance.shifts import get_shift_assignments, get_shift_timings, shift_for_day
+from compliance.utils import (
+	WRITE_RETRIES,
+	AdaptiveBatchSize,
+	bulk_upsert,
+	get_daily_attendance_doctype,
+	get_standard_values,
+	is_retryable_write_error,
+	retry_delay,
+)
+
+# Maximum number of planned employees waiting for the writer
+PIPELINE_QUEUE_SIZE = 8
+
+# One planned working day; check_in/check_out are None on absent days.
+# shift_type is the day's Shift Type, if any; overtime_check_in is set on
+# days whose check-out falls in the overtime window, see _generate_times_fast;
+# check_in_previous_day is set when a shift starting around midnight was
+# checked into before midnight
+DayPlan = namedtuple(
+	"DayPlan",
+	["date", "check_in", "check_out", "is_absent", "shift_type", "overtime_check_in", "check_in_previous_day"],
+	defaults=(None, None, False)
+)
+
+_PIPELINE_DONE = object()
+
+# Redis key prefix of the cancel requests for running generator jobs
+CANCEL_KEY = "fake_attendance_cancel"
+
+
+class GenerationCancelled(Exception):
+	"""Raised in a running generator job once the user has cancelled it"""
+
+
+# Leave Applications inserted per commit in the leave phase
+LEAVE_BATCH_SIZE = 50
+
+# Late arrivals and early exits are spread over this many minutes
+LATE_WINDOW_MINUTES = 60
+EARLY_EXIT_WINDOW_MINUTES = 60
+LAST_MINUTE = 23 * 60 + 59
+# Index of the overtime component in the check-out mixture of _time_windows
+OVERTIME_COMPONENT = 1
+
+# Employee Checkin punches: employees written between HRMS attendance
+# processing passes, and the break before an overtime IN punch
+CHECKIN_PROCESS_BATCH = 200
+OVERTIME_BREAK_MINUTES = 10
+CHECKIN_FIELDS = [
+	"employee", "employee_name", "log_type", "time", "device_id", "skip_auto_attendance",
+	"shift", "shift_start", "shift_end", "shift_actual_start", "shift_actual_end"
+]
+
+# Fields read by the planner and writer
+DEPT_CONFIG_FIELDS = [
+	"department",
+	"late_arrival_probability",
+	"absent_probability",
+	"overtime_probability",
+	"early_exit_probability",
+	"check_in_start_time",
+	"check_in_end_time",
+	"check_out_start_time",
+	"check_out_end_time",
+	"overtime_start_time",
+	"overtime_end_time",
+	"working_hours",
+	"grace_period_minutes",
+	"overtime_threshold_hours",
+	"shift_type"
+]
+EMPLOYEE_FIELDS = ["name", "employee_name", "department", "designation", "biometric_id", "company_email", "date_of_joining", "holiday_list", "branch", "cnic"]
+
+# Columns written for each generated row, after the standard name/owner/timestamp columns
+ATTENDANCE_LOG_FIELDS = ["employee", "employee_name", "attendance_date", "attendance_time", "attendance", "company", "department", "designation", "biometric_id", "log_type"]
+DAILY_ROW_FIELDS = ["date", "day", "check_in_1", "check_out_1", "difference", "absent", "present", "weekday", "day_type"]
+
 def log_message(message, level="info", show_user=True):
 	"""
 	Custom logging function with different levels and options
@@ -57,9 +145,11 @@ def generate_attendance(name):
 	try:
 		doc = frappe.get_doc("Fake Attendance Generator", name)
 		
-		# Set status to In Progress
-		doc.status = "In Progress"
-		doc.save()
+		if doc.status in ("Queued", "In Progress"):
+			return {"status": "error", "message": f"Generation is already {doc.status.lower()}"}
+		if doc.lock_status == "Held":
+			# A cancelled job keeps its lock until it has stopped writing
+			return {"status": "error", "message": "The previous run is still stopping, please try again shortly"}
 		
 		log_message("🚀 Starting Fake Attendance Generation as Background Job...", "info")
 		log_message(f"📄 Document: {doc.name}", "info")
@@ -68,15 +158,11 @@ def generate_attendance(name):
 		log_message(f"🏭 Department: {doc.department or 'All Departments'}", "info")
 		log_message("⏳ This will run in the background. You can check the status later.", "info")
 		
-		# Enqueue the background job
-		frappe.enqueue(
-			method="compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator.generate_attendance_background",
-			doc_name=name,
-			queue="long",
-			timeout=3600,  # 1 hour timeout
-			job_name=f"Generate Fake Attendance - {doc.name}",
-			now=False
-		)
+		# Enqueue the background job, or wait behind runs with an overlapping scope
+		blocked_by = schedule_generation(doc)
+		if blocked_by:
+			log_message(f"⏸️ Waiting for overlapping runs: {', '.join(blocked_by)}", "info")
+			return {"status": "queued", "blocked_by": blocked_by, "message": "Waiting for overlapping runs to finish"}
 		
 		return {"status": "queued", "message": "Background job queued successfully"}
 		
@@ -95,6 +181,16 @@ def generate_attendance(name):
 
 def generate_attendance_background(doc_name):
 	"""Background job to generate fake attendance"""
+	try:
+		return _generate_attendance(doc_name)
+	finally:
+		frappe.cache().delete_value(f"{CANCEL_KEY}:{doc_name}")
+		release_lock("Fake Attendance Generator", doc_name)
+		# Workspace number cards and chart read these cached aggregates
+		refresh_workspace_stats()
+
+def _generate_attendance(doc_name):
+	metrics = batcher = None
 	try:
 		doc = frappe.get_doc("Fake Attendance Generator", doc_name)
 		
@@ -124,42 +220,33 @@ def generate_attendance_background(doc_name):
 		total_days = (end_date - start_date).days + 1
 		log_message(f"📅 Total days to process: {total_days}", "info")
 		
-		# Process employees
-		total_created = 0
-		processed_employees = 0
+		# In gap-fill mode, days with existing (e.g. biometric) logs are left alone
+		covered_days = None
+		if doc.gap_fill:
+			covered_days = _get_covered_days([emp.name for emp in employees], start_date, end_date)
+			log_message(f"🧩 Gap-fill: {sum(bin(mask).count('1') for mask in covered_days.values())} employee-days already have logs", "info")
+		
+		# Plan and write through the producer/consumer pipeline
+		def on_progress(processed_employees, total_created):
+			if frappe.cache().get_value(f"{CANCEL_KEY}:{doc_name}"):
+				raise GenerationCancelled
+			doc.generation_log = f"Processed {processed_employees}/{len(employees)} employees. Created {total_created} records for {total_days} days ({start_date} to {end_date})."
+			doc.save()
 		
-		for emp in employees:
-			try:
-				log_message(f"👤 Processing employee: {emp.name} ({emp.employee_name}) - {emp.department}", "info")
-				
-				# Get configuration for this employee's department
-				cfg = dept_configs.get(emp.department, _default_cfg())
-				log_message(f"⚙️ Using config for department: {emp.department}", "info")
-				
-				# Generate attendance for this employee
-				created = _generate_for_employee_fast(doc, emp, cfg)
-				log_message(f"✅ Employee {emp.name}: Created {created} records", "info")
-				
-				total_created += created
-				processed_employees += 1
-				
-				# Update progress in the document
-				doc.generation_log = f"Processed {processed_employees}/{len(employees)} employees. Created {total_created} records for {total_days} days ({start_date} to {end_date})."
-				doc.save()
-				
-				# Commit after each employee
-				frappe.db.commit()
-				
-			except Exception as e:
-				log_message(f"❌ Error for employee {emp.name}: {str(e)}", "error")
-				frappe.db.rollback()
-				continue
+		batcher = AdaptiveBatchSize(doc.batch_size)
+		metrics = RunMetrics("Fake Attendance Generator", doc, len(employees), generator=doc.name)
+		total_created, processed_employees = _run_generation_pipeline(doc, employees, dept_configs, on_progress=on_progress, covered_days=covered_days, batcher=batcher, metrics=metrics)
+		log_message(f"📦 Writes: {batcher.summary()}", "info")
 		
 		# Update final status
 		doc.status = "Completed"
 		doc.generated_records = total_created
-		doc.generation_log = f"✅ Completed! Generated {total_created} attendance records for {processed_employees} employees across {total_days} days ({start_date} to {end_date})."
+		doc.generation_log = f"✅ Completed! Generated {total_created} attendance records for {processed_employees} employees across {total_days} days ({start_date} to {end_date}). Writes: {batcher.summary()}."
 		doc.save()
+		frappe.db.commit()
+		
+		clear_summary_cache(doc.company)
+		metrics.save("Completed", batcher)
 		
 		log_message(f"🎉 Generation completed! Total: {total_created} records for {processed_employees} employees", "success")
 		
@@ -176,6 +263,16 @@ def generate_attendance_background(doc_name):
 		
 		return {"status": "success", "records_created": total_created, "employees_processed": processed_employees}
 		
+	except GenerationCancelled:
+		# The employee being written is rolled back, earlier ones stay committed
+		frappe.db.rollback()
+		frappe.db.set_value("Fake Attendance Generator", doc_name, {"status": "Failed", "generation_log": "Cancelled by user"})
+		frappe.db.commit()
+		log_message(f"🛑 Generation {doc_name} cancelled by user", "info", show_user=False)
+		if metrics:
+			metrics.save("Failed", batcher, error="Cancelled by user")
+		return {"status": "cancelled"}
+		
 	except Exception as e:
 		log_message(f"❌ Background job error: {str(e)}", "error")
 		
@@ -185,9 +282,13 @@ def generate_attendance_background(doc_name):
 			doc.status = "Failed"
 			doc.generation_log = f"❌ Failed: {str(e)}"
 			doc.save()
+			frappe.db.commit()
 		except:
 			pass
 		
+		if metrics:
+			metrics.save("Failed", batcher, error=str(e))
+		
 		return {"status": "error", "message": str(e)}
 
 @frappe.whitelist()
@@ -210,13 +311,20 @@ def cancel_generation(doc_name):
 	try:
 		doc = frappe.get_doc("Fake Attendance Generator", doc_name)
 		
-		if doc.status == "In Progress":
-			# Cancel the job by setting status to Failed with cancellation message
+		if doc.status == "Queued":
+			# Not started yet, so the lock can be dropped right away
 			frappe.db.set_value("Fake Attendance Generator", doc_name, "status", "Failed")
 			frappe.db.set_value("Fake Attendance Generator", doc_name, "generation_log", "Cancelled by user")
+			release_lock("Fake Attendance Generator", doc_name)
 			
 			log_message("✅ Generation cancelled successfully", "success")
 			return {"status": "cancelled"}
+		elif doc.status == "In Progress":
+			# The job stops after its current employee, then marks itself Failed and releases its lock
+			frappe.cache().set_value(f"{CANCEL_KEY}:{doc_name}", 1, expires_in_sec=STALE_LOCK_SECONDS)
+			
+			log_message("⏳ Cancelling, the job stops after the current employee", "info")
+			return {"status": "cancelling"}
 		else:
 			log_message("❌ Cannot cancel - job is not running", "warning")
 			return {"status": "error", "message": "Job is not running"}
@@ -238,7 +346,7 @@ def _get_employees(doc):
 		
 		log_message(f"🔍 Employee filters: {filters}", "info")
 		
-		employees = frappe.get_all("Employee", filters=filters, fields=["name", "employee_name", "department", "designation", "biometric_id", "company_email", "date_of_joining", "holiday_list", "branch", "cnic"])
+		employees = frappe.get_all("Employee", filters=filters, fields=EMPLOYEE_FIELDS)
 		
 		log_message(f"✅ Found {len(employees)} employees", "info")
 		
@@ -255,20 +363,7 @@ def _get_dept_configs():
 	# Get department-specific configurations
 	configs = {}
 	try:
-		dept_configs = frappe.get_all("Department Attendance Config", fields=[
-			"department", 
-			"late_arrival_probability", 
-			"absent_probability", 
-			"overtime_probability", 
-			"early_exit_probability",
-			"check_in_start_time", 
-			"check_in_end_time", 
-			"check_out_start_time", 
-			"check_out_end_time",
-			"overtime_start_time",
-			"overtime_end_time",
-			"working_hours"
-		])
+		dept_configs = frappe.get_all("Department Attendance Config", fields=DEPT_CONFIG_FIELDS)
 		
 		log_message(f"📋 Found {len(dept_configs)} department configurations", "info")
 		
@@ -287,13 +382,19 @@ def _default_cfg():
 		"late_arrival_probability": 10,
 		"absent_probability": 5,
 		"overtime_probability": 15,
+		"early_exit_probability": 8,
+		"grace_period_minutes": 15,
+		"overtime_threshold_hours": 8.5,
 		"check_in_start_time": "08:00:00",
 		"check_in_end_time": "09:00:00",
 		"check_out_start_time": "17:00:00",
-		"check_out_end_time": "18:00:00"
+		"check_out_end_time": "18:00:00",
+		"overtime_start_time": "18:00:00",
+		"overtime_end_time": "22:00:00"
 	})
 
 def _create_employee_attendance_fast(doc, emp, month_name, year):
+	"""Return the name of the employee's Employee Attendance for the month, creating it if needed"""
 	try:
 		log_message(f"Creating Employee Attendance for {emp.name} - {month_name} {year}", "info")
 		
@@ -306,7 +407,7 @@ def _create_employee_attendance_fast(doc, emp, month_name, year):
 		
 		if existing:
 			log_message(f"Employee Attendance already exists: {existing[0].name}", "info")
-			return frappe.get_doc("Employee Attendance", existing[0].name)
+			return existing[0].name
 		
 		# Create new with only essential fields
 		emp_data = {
@@ -343,330 +444,730 @@ def _create_employee_attendance_fast(doc, emp, month_name, year):
 		emp_attendance.insert()
 		
 		log_message(f"✅ Successfully created Employee Attendance: {emp_attendance.name}", "success")
-		return emp_attendance
+		return emp_attendance.name
 		
 	except Exception as e:
+		if is_retryable_write_error(e):
+			raise
 		log_message(f"❌ Error creating Employee Attendance: {str(e)}", "error")
 		return None
 
-def _add_daily_attendance_fast(emp_attendance_name, date, check_in_time, check_out_time, is_absent):
+def _daily_record_data(date, check_in_time, check_out_time, is_absent):
+	# Calculate hours
+	total_hours = 0
+	if check_in_time and check_out_time:
+		check_in_dt = datetime.combine(date, check_in_time)
+		check_out_dt = datetime.combine(date, check_out_time)
+		if check_out_dt <= check_in_dt:
+			# Check-out after midnight, on the next calendar day
+			check_out_dt += timedelta(days=1)
+		total_hours = (check_out_dt - check_in_dt).total_seconds() / 3600
+	
+	# Prepare daily record data with correct field names
+	return {
+		"date": date,
+		"day": date.strftime("%A"),
+		"check_in_1": check_in_time.strftime("%H:%M:%S") if check_in_time else "",
+		"check_out_1": check_out_time.strftime("%H:%M:%S") if check_out_time else "",
+		"difference": f"{int(total_hours):02d}:{int((total_hours % 1) * 60):02d}:00" if total_hours > 0 else "",
+		"absent": is_absent,
+		"present": not is_absent,
+		"weekday": date.weekday() < 5,
+		"day_type": "Weekday" if date.weekday() < 5 else "Weekly Off"
+	}
+
+def _upsert_daily_rows(emp_attendance_name, days, batcher=None):
+	"""
+	Write the `table1` rows for a list of DayPlan tuples in bulk.
+	
+	Rows are keyed on (parent, date), so reruns update days in place. The
+	row's idx is its day of the month, which keeps the grid in date order.
+	"""
+	return _bulk_upsert_daily_rows({emp_attendance_name: days}, batcher)
+
+def _bulk_upsert_daily_rows(days_by_parent, batcher=None):
+	"""
+	Write the `table1` rows of several Employee Attendance documents at once, see _upsert_daily_rows.
+	
+	Row names are random, so the upsert only matches existing rows through
+	the (parent, date) unique key. Where that key is missing (duplicates at
+	patch time, or the app installed later) the days' existing rows are
+	deleted first, in the same transaction, so reruns never duplicate them.
+	"""
+	daily_doctype = get_daily_attendance_doctype()
+	if not is_natural_key_enforced(daily_doctype, ["parent", "date"]):
+		for emp_attendance_name, days in days_by_parent.items():
+			if not days:
+				continue
+			frappe.db.sql(
+				f"""
+				DELETE FROM `tab{daily_doctype}`
+				WHERE parent = %(parent)s AND parenttype = 'Employee Attendance' AND parentfield = 'table1'
+					AND date IN %(dates)s
+				""",
+				{"parent": emp_attendance_name, "dates": [day.date for day in days]}
+			)
+	
+	standard = get_standard_values()
+	rows = []
+	for emp_attendance_name, days in days_by_parent.items():
+		for day in days:
+			record = _daily_record_data(day.date, day.check_in, day.check_out, day.is_absent)
+			rows.append((
+				frappe.generate_hash(length=10), standard["owner"], standard["creation"], standard["modified"], standard["modified_by"],
+				emp_attendance_name, "Employee Attendance", "table1", day.date.day,
+				*(record[field] for field in DAILY_ROW_FIELDS)
+			))
+	
+	return bulk_upsert(
+		daily_doctype,
+		["name", "owner", "creation", "modified", "modified_by", "parent", "parenttype", "parentfield", "idx", *DAILY_ROW_FIELDS],
+		rows,
+		["modified", "modified_by", *DAILY_ROW_FIELDS],
+		batcher=batcher
+	)
+
+def _upsert_attendance_logs(doc, emp, plan, batcher=None):
+	"""
+	Write Check In/Check Out logs for present days.
+	
+	Generated logs have deterministic names per employee, day and log type
+	and are upserted on name, so reruns update them in place while
+	biometric logs are never matched. On planned days that are now absent
+	the run's own earlier logs are deleted, in the same transaction.
+	"""
+	standard = get_standard_values()
+	biometric_id = emp.biometric_id or "505"
+	rows = []
+	for day in plan:
+		if day.is_absent:
+			continue
+		# attendance_date stays the shift date; the device line of a punch on
+		# another calendar day carries that date, as a real device would
+		for log_type, attendance_time, punch_date, punch in (
+			("Check In", day.check_in, _check_in_datetime(day).date(), "(1, 0)"),
+			("Check Out", day.check_out, _punch_datetime(day, day.check_out).date(), "(0, 1)")
+		):
+			rows.append((
+				_attendance_log_name(emp.name, day.date, log_type), standard["owner"], standard["creation"], standard["modified"], standard["modified_by"],
+				emp.name, emp.employee_name, day.date, attendance_time,
+				f" : {biometric_id} : {punch_date} {attendance_time.strftime('%H:%M:%S')} {punch}",
+				doc.company, emp.department, emp.designation, biometric_id, log_type
+			))
+	
+	absent_names = [
+		_attendance_log_name(emp.name, day.date, log_type)
+		for day in plan if day.is_absent
+		for log_type in ("Check In", "Check Out")
+	]
+	if absent_names:
+		frappe.db.sql("""
+			DELETE FROM `tabAttendance Logs`
+			WHERE name IN %(names)s
+		""", {"names": absent_names})
+	
+	return bulk_upsert(
+		"Attendance Logs",
+		["name", "owner", "creation", "modified", "modified_by", *ATTENDANCE_LOG_FIELDS],
+		rows,
+		["modified", "modified_by", *ATTENDANCE_LOG_FIELDS],
+		batcher=batcher
+	)
+
+def _attendance_log_name(employee, date, log_type):
+	return f"FAG-LOG-{employee}-{date.strftime('%Y%m%d')}-{'IN' if log_type == 'Check In' else 'OUT'}"
+
+def _get_covered_days(employees, start_date, end_date):
+	"""
+	Prefetch which days already have Attendance Logs, in one query.
+	
+	Returns:
+		dict: employee -> int bitmap, bit n set when start_date + n days has logs
+	"""
+	covered = {}
+	if not employees:
+		return covered
+	
+	rows = frappe.db.sql("""
+		SELECT DISTINCT employee, DATEDIFF(attendance_date, %(start_date)s)
+		FROM `tabAttendance Logs`
+		WHERE employee IN %(employees)s
+			AND attendance_date BETWEEN %(start_date)s AND %(end_date)s
+	""", {"employees": employees, "start_date": start_date, "end_date": end_date})
+	
+	for employee, offset in rows:
+		covered[employee] = covered.get(employee, 0) | (1 << offset)
+	
+	return covered
+
+def _plan_employee_days(start_date, end_date, include_weekends, cfg, covered_mask=0, include_overtime=True, shift_assignments=(), shift_timings=None):
+	"""
+	Build the day-by-day plan for one employee.
+	
+	Runs on the planner thread, so it must not touch frappe.db, frappe.local
+	or log_message. Absence is rolled once per day here and both outputs
+	(Attendance Logs and Employee Attendance) are written from the same plan.
+	
+	Args:
+		covered_mask (int): bitmap of day offsets from start_date that already have attendance
+		shift_assignments (list): the employee's assignments, from compliance.shifts.get_shift_assignments
+		shift_timings (dict): Shift Type -> timings, prefetched for every shift in the run
+	
+	Returns:
+		list[DayPlan]: one entry per working day in the range
+	"""
+	plan = []
+	shift_timings = shift_timings or {}
+	# Windows per Shift Type (None: the config's own windows)
+	windows_by_shift = {}
+	current_date = start_date
+	offset = 0
+	
+	while current_date <= end_date:
+		# Skip weekends if configured, and days that are already covered
+		if (include_weekends or current_date.weekday() < 5) and not (covered_mask >> offset) & 1:
+			if random.random() * 100 < flt(cfg.absent_probability):
+				plan.append(DayPlan(current_date, None, None, True))
+			else:
+				shift_type = shift_for_day(shift_assignments, current_date, cfg.shift_type)
+				shift_type = shift_type if shift_type in shift_timings else None
+				if shift_type not in windows_by_shift:
+					windows_by_shift[shift_type] = _time_windows(cfg, include_overtime, shift_timings.get(shift_type))
+				check_in_time, check_out_time, overtime_check_in, previous_day = _generate_times_fast(windows_by_shift[shift_type])
+				plan.append(DayPlan(current_date, check_in_time, check_out_time, False, shift_type, overtime_check_in, previous_day))
+		
+		current_date = add_days(current_date, 1)
+		offset += 1
+	
+	return plan
+
+def _plan_producer(plan_queue, stop_event, employees, dept_configs, start_date, end_date, include_weekends, include_overtime, covered_days, shift_assignments, shift_timings):
+	"""Producer stage: plan each employee and hand the plan to the writer"""
 	try:
-		# Get a fresh copy of the document to avoid modification conflicts
-		emp_attendance = frappe.get_doc("Employee Attendance", emp_attendance_name)
-		
-		# Check if exists
-		existing_record = None
-		for record in emp_attendance.table1:
-			if record.date == date:
-				existing_record = record
-				break
-		
-		# Calculate hours
-		total_hours = 0
-		if check_in_time and check_out_time:
-			check_in_dt = datetime.combine(date, check_in_time)
-			check_out_dt = datetime.combine(date, check_out_time)
-			total_hours = (check_out_dt - check_in_dt).total_seconds() / 3600
-		
-		# Prepare daily record data with correct field names
-		daily_record_data = {
-			"date": date,
-			"day": date.strftime("%A"),
-			"check_in_1": check_in_time.strftime("%H:%M:%S") if check_in_time else "",
-			"check_out_1": check_out_time.strftime("%H:%M:%S") if check_out_time else "",
-			"difference": f"{int(total_hours):02d}:{int((total_hours % 1) * 60):02d}:00" if total_hours > 0 else "",
-			"absent": is_absent,
-			"present": not is_absent,
-			"weekday": date.weekday() < 5,
-			"day_type": "Weekday" if date.weekday() < 5 else "Weekly Off"
-		}
-		
-		if existing_record:
-			# Update existing record
-			for key, value in daily_record_data.items():
-				setattr(existing_record, key, value)
-		else:
-			# Add new record
-			emp_attendance.append("table1", daily_record_data)
-		
-		# Save the document
-		emp_attendance.save()
-		
-		# Log success for debugging
-		log_message(f"Added daily attendance for {date}: Check-in={check_in_time}, Check-out={check_out_time}, Absent={is_absent}", "info")
-		
+		for emp in employees:
+			cfg = dept_configs.get(emp.department) or _default_cfg()
+			plan = _plan_employee_days(
+				start_date, end_date, include_weekends, cfg, covered_days.get(emp.name, 0), include_overtime,
+				shift_assignments.get(emp.name, ()), shift_timings
+			)
+			if not _put_blocking(plan_queue, (emp, plan), stop_event):
+				return
 	except Exception as e:
-		log_message(f"❌ Error adding daily attendance for {date}: {str(e)}", "error")
-		# Re-raise the exception to see what's happening
-		raise e
+		_put_blocking(plan_queue, e, stop_event)
+	finally:
+		_put_blocking(plan_queue, _PIPELINE_DONE, stop_event)
 
-def _generate_for_employee_fast(doc, emp, cfg):
+def _put_blocking(plan_queue, item, stop_event):
+	# Wait for room in the queue (backpressure) unless the writer has stopped
+	while not stop_event.is_set():
+		try:
+			plan_queue.put(item, timeout=1)
+			return True
+		except Full:
+			continue
+	return False
+
+def _run_generation_pipeline(doc, employees, dept_configs, on_progress=None, covered_days=None, batcher=None, metrics=None):
+	"""
+	Overlap schedule planning with database writes.
+	
+	A planner thread builds compact per-employee DayPlan batches while the
+	calling thread, which owns the database connection, writes them. The
+	bounded queue keeps at most PIPELINE_QUEUE_SIZE plans in memory.
+	
+	Args:
+		doc: the Fake Attendance Generator (or any object with the same fields)
+		employees (list): rows returned by _get_employees
+		dept_configs (dict): department -> config, from _get_dept_configs
+		on_progress (callable): called as on_progress(processed, created) after each employee
+		covered_days (dict): employee -> bitmap of days to leave untouched, from _get_covered_days
+		batcher (AdaptiveBatchSize): write chunk sizing, created from doc.batch_size if not given
+		metrics (RunMetrics): records phase timings, rows and errors when given
+	
+	Returns:
+		tuple: (total records created, employees processed)
+	"""
+	start_date, end_date = getdate(doc.start_date), getdate(doc.end_date)
+	
+	# Shifts are resolved up front, the planner thread cannot query
+	shift_assignments = get_shift_assignments([emp.name for emp in employees], start_date, end_date)
+	shift_timings = get_shift_timings(
+		{cfg.shift_type for cfg in dept_configs.values()}
+		| {shift_type for assignments in shift_assignments.values() for _, _, shift_type in assignments}
+	)
+	
+	plan_queue = Queue(maxsize=PIPELINE_QUEUE_SIZE)
+	stop_event = Event()
+	producer = Thread(
+		target=_plan_producer,
+		args=(
+			plan_queue, stop_event, employees, dept_configs,
+			start_date, end_date, doc.include_weekends, doc.generate_overtime, covered_days or {},
+			shift_assignments, shift_timings
+		),
+		name="fake-attendance-planner",
+		daemon=True
+	)
+	producer.start()
+	
+	batcher = batcher or AdaptiveBatchSize(doc.batch_size)
+	total_created = 0
+	processed_employees = 0
+	absent_days = {}
+	# Shift Types with checkins not yet processed by HRMS
+	checkin_shifts = set()
+	
 	try:
-		log_message(f"🚀 Starting _generate_for_employee_fast for {emp.name}", "info")
-		
-		created = 0
-		current_date = getdate(doc.start_date)
-		end_date = getdate(doc.end_date)
-		
-		log_message(f"📅 Date range: {current_date} to {end_date}", "info")
-		
-		# Process the full date range as specified by user
-		days_processed = 0
-		
-		log_message(f"🔍 Processing employee {emp.name} from {current_date} to {end_date}", "info")
-		log_message(f"📊 Config: Late={cfg.late_arrival_probability}%, Absent={cfg.absent_probability}%, OT={cfg.overtime_probability}%", "info")
-		
-		# STEP 1: Create Attendance Logs first
-		attendance_logs_batch = []
-		
-		while current_date <= end_date:
-			try:
-				log_message(f"📅 Processing date: {current_date} (day {days_processed + 1})", "info")
-				
-				# Skip weekends if configured
-				if not doc.include_weekends and current_date.weekday() >= 5:
-					log_message(f"🏖️ Skipping weekend: {current_date}", "info")
-					current_date = add_days(current_date, 1)
-					continue
+		with metrics.phase("attendance") if metrics else nullcontext():
+			while True:
+				item = plan_queue.get()
+				if item is _PIPELINE_DONE:
+					break
+				if isinstance(item, Exception):
+					raise item
 				
-				# Randomly determine if employee is absent
-				absent_roll = random.randint(1, 100)
-				log_message(f"🎲 Absent roll: {absent_roll} vs threshold: {cfg.absent_probability}", "info")
-				
-				if absent_roll <= cfg.absent_probability:
-					# Create leave application
-					log_message(f"🏠 Employee absent on {current_date}, creating leave application", "info")
-					_create_leave_application_fast(doc, emp, current_date)
-					# Don't add attendance logs for absent days
-				else:
-					# Generate times
-					log_message(f"⏰ Generating times for {current_date}", "info")
-					check_in_time, check_out_time = _generate_times_fast(cfg)
+				emp, plan = item
+				try:
+					created = _write_employee_plan_with_retry(doc, emp, plan, batcher, shift_timings)
+					total_created += created
+					processed_employees += 1
+					absent_days[emp.name] = [day.date for day in plan if day.is_absent]
 					
-					log_message(f"⏰ Generated times for {current_date}: Check-in={check_in_time}, Check-out={check_out_time}", "info")
+					if on_progress:
+						on_progress(processed_employees, total_created)
 					
-					# Add to batch for attendance logs
-					attendance_logs_batch.extend([
-						{
-							"doctype": "Attendance Logs",
-							"employee": emp.name,
-							"employee_name": emp.employee_name,
-							"attendance_date": current_date,
-							"attendance_time": check_in_time,
-							"attendance": f" : {emp.biometric_id or '505'} : {current_date} {check_in_time.strftime('%H:%M:%S')} (1, 0)",
-							"company": doc.company,
-							"department": emp.department,
-							"designation": emp.designation,
-							"biometric_id": emp.biometric_id or "505",
-							"log_type": "Check In"
-						},
-						{
-							"doctype": "Attendance Logs",
-							"employee": emp.name,
-							"employee_name": emp.employee_name,
-							"attendance_date": current_date,
-							"attendance_time": check_out_time,
-							"attendance": f" : {emp.biometric_id or '505'} : {current_date} {check_out_time.strftime('%H:%M:%S')} (0, 1)",
-							"company": doc.company,
-							"department": emp.department,
-							"designation": emp.designation,
-							"biometric_id": emp.biometric_id or "505",
-							"log_type": "Check Out"
-						}
-					])
+					# Commit after each employee
+					frappe.db.commit()
 					
-					log_message(f"📝 Added 2 attendance logs to batch for {current_date}. Total batch size: {len(attendance_logs_batch)}", "info")
-				
-				days_processed += 1
-				current_date = add_days(current_date, 1)
+					# HRMS marks attendance from the checkins once per batch of employees
+					if doc.generate_checkins:
+						checkin_shifts.update(day.shift_type for day in plan if day.shift_type and not day.is_absent)
+						if processed_employees % CHECKIN_PROCESS_BATCH == 0:
+							_process_auto_attendance(checkin_shifts)
+							checkin_shifts.clear()
 				
-			except Exception as e:
-				log_message(f"❌ Error processing date {current_date}: {str(e)}", "error")
-				current_date = add_days(current_date, 1)
-				continue
-		
-		log_message(f"📊 Total days processed: {days_processed}", "info")
-		log_message(f"📦 Attendance logs in batch: {len(attendance_logs_batch)}", "info")
-		
-		# STEP 2: Insert Attendance Logs first
-		if attendance_logs_batch:
-			log_message(f"🚀 Preparing to insert {len(attendance_logs_batch)} attendance logs", "info")
-			inserted_logs = _insert_batch(attendance_logs_batch)
-			log_message(f"✅ Successfully inserted {inserted_logs} attendance logs out of {len(attendance_logs_batch)}", "success")
-			created = inserted_logs  # Update created count based on actual insertions
-		else:
-			log_message("⚠️ No attendance logs to insert", "warning")
-			created = 0
-		
-		# STEP 3: Now create Employee Attendance
-		month_name = getdate(doc.start_date).strftime("%B")
-		year = getdate(doc.start_date).year
-		
-		log_message(f"📋 Creating Employee Attendance for {month_name} {year}", "info")
-		emp_attendance = _create_employee_attendance_fast(doc, emp, month_name, year)
-		
-		# Debug: Check if Employee Attendance was created
-		if not emp_attendance:
-			log_message(f"❌ Failed to create Employee Attendance for {emp.name}", "error")
-			return created
-		
-		log_message(f"✅ Created Employee Attendance: {emp_attendance.name} for {emp.name}", "success")
-		
-		# STEP 4: Now add daily attendance records to Employee Attendance
-		current_date = getdate(doc.start_date)
-		while current_date <= end_date:
-			try:
-				# Skip weekends if configured
-				if not doc.include_weekends and current_date.weekday() >= 5:
-					current_date = add_days(current_date, 1)
+				except GenerationCancelled:
+					raise
+				except Exception as e:
+					log_message(f"❌ Error for employee {emp.name}: {str(e)}", "error")
+					frappe.db.rollback()
+					if metrics:
+						metrics.errors += 1
 					continue
-				
-				# Check if employee was absent on this date
-				absent_roll = random.randint(1, 100)
-				is_absent = absent_roll <= cfg.absent_probability
-				
-				if is_absent:
-					# Add absent record
-					try:
-						_add_daily_attendance_fast(emp_attendance.name, current_date, None, None, True)
-						log_message(f"✅ Added absent record for {current_date}", "success")
-					except Exception as e:
-						log_message(f"❌ Error adding absent record for {current_date}: {str(e)}", "error")
-				else:
-					# Generate times again for consistency
-					check_in_time, check_out_time = _generate_times_fast(cfg)
-					
-					# Add present record
-					try:
-						_add_daily_attendance_fast(emp_attendance.name, current_date, check_in_time, check_out_time, False)
-						log_message(f"✅ Added present record for {current_date}: {check_in_time} - {check_out_time}", "success")
-					except Exception as e:
-						log_message(f"❌ Error adding present record for {current_date}: {str(e)}", "error")
-				
-				current_date = add_days(current_date, 1)
-				
-			except Exception as e:
-				log_message(f"❌ Error processing date {current_date} for Employee Attendance: {str(e)}", "error")
-				current_date = add_days(current_date, 1)
-				continue
-		
-		# Final save of Employee Attendance to ensure all changes are persisted
-		if emp_attendance:
-			try:
-				# Get a fresh copy to avoid modification conflicts
-				fresh_emp_attendance = frappe.get_doc("Employee Attendance", emp_attendance.name)
-				fresh_emp_attendance.save()
-				log_message(f"Final save of Employee Attendance {fresh_emp_attendance.name} with {len(fresh_emp_attendance.table1)} daily records", "info")
-			except Exception as e:
-				log_message(f"❌ Error in final save of Employee Attendance: {str(e)}", "error")
-		
-		log_message(f"Employee {emp.name}: Created {created} attendance records, processed {days_processed} days", "info")
-		return created
-		
-	except Exception as e:
-		log_message(f"❌ Error in _generate_for_employee_fast for {emp.name}: {str(e)}", "error")
-		return 0
+	finally:
+		stop_event.set()
+		producer.join(timeout=5)
+	
+	if checkin_shifts:
+		_process_auto_attendance(checkin_shifts)
+	
+	if metrics:
+		metrics.add_rows("attendance", total_created)
+	
+	# Leave phase, kept out of the attendance write loop
+	if doc.queue_leave_applications:
+		frappe.enqueue(
+			method="compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator.create_leave_applications",
+			company=doc.company,
+			absent_days=absent_days,
+			queue="long",
+			timeout=3600,
+			enqueue_after_commit=True
+		)
+	else:
+		with metrics.phase("leave") if metrics else nullcontext():
+			leave_applications = _run_leave_phase(doc.company, absent_days)
+		if metrics:
+			metrics.add_rows("leave", leave_applications)
+	
+	return total_created, processed_employees
+
+def _write_employee_plan_with_retry(doc, emp, plan, batcher, shift_timings=None):
+	"""
+	Write one employee's plan, retrying the whole transaction on deadlocks
+	and lock wait timeouts. Writes are keyed upserts, so a retry after a
+	partial write cannot duplicate rows.
+	"""
+	for attempt in range(WRITE_RETRIES + 1):
+		try:
+			return _write_employee_plan(doc, emp, plan, batcher, shift_timings)
+		except Exception as e:
+			if attempt == WRITE_RETRIES or not is_retryable_write_error(e):
+				raise
+			frappe.db.rollback()
+			batcher.record_retry()
+			log_message(f"🔁 Lock conflict for {emp.name}, retrying with batch size {batcher.size}", "warning", show_user=False)
+			sleep(retry_delay(attempt))
 
-def _generate_times_fast(cfg):
-	check_in_start = get_time(cfg.check_in_start_time)
-	check_in_end = get_time(cfg.check_in_end_time)
-	check_out_start = get_time(cfg.check_out_start_time)
-	check_out_end = get_time(cfg.check_out_end_time)
+def _write_employee_plan(doc, emp, plan, batcher=None, shift_timings=None):
+	"""Writer stage: persist one employee's plan and return the number of logs created"""
+	# STEP 1: Attendance Logs for present days
+	created = _upsert_attendance_logs(doc, emp, plan, batcher)
+	
+	# STEP 2: Employee Attendance rows, one document per month in the plan
+	# (absent days get their Leave Applications later, in the leave phase)
+	days_by_month = {}
+	for day in plan:
+		days_by_month.setdefault((day.date.strftime("%B"), day.date.year), []).append(day)
+	
+	for (month_name, year), days in days_by_month.items():
+		emp_attendance_name = _create_employee_attendance_fast(doc, emp, month_name, year)
+		if not emp_attendance_name:
+			log_message(f"❌ Failed to create Employee Attendance for {emp.name}", "error")
+			continue
+		_upsert_daily_rows(emp_attendance_name, days, batcher)
+	
+	# STEP 3: Employee Checkin punches for HRMS attendance processing
+	if doc.generate_checkins:
+		_upsert_employee_checkins(emp, plan, shift_timings or {}, batcher)
+	
+	log_message(f"✅ Employee {emp.name}: Created {created} records, planned {len(plan)} days", "info", show_user=False)
+	return created
+
+def _upsert_employee_checkins(emp, plan, shift_timings, batcher=None):
+	"""
+	Write IN/OUT Employee Checkin punches for present days, plus an OUT/IN
+	pair around the overtime break on overtime days.
 	
-	check_in_time = _random_time_fast(check_in_start, check_in_end)
-	check_out_time = _random_time_fast(check_out_start, check_out_end)
+	Punches are bulk inserted, so HRMS hooks do not run; the shift fields
+	HRMS would fetch are filled from the day's Shift Type instead. Names
+	are deterministic per employee, day and punch: a rerun first deletes
+	its earlier punches for the planned days, except those HRMS already
+	linked to an Attendance, which are kept as they are.
 	
-	return check_in_time, check_out_time
+	Returns:
+		int: number of punches written
+	"""
+	standard = get_standard_values()
+	rows = []
+	for day in plan:
+		if day.is_absent:
+			continue
+		
+		check_in = _check_in_datetime(day)
+		check_out = _punch_datetime(day, day.check_out)
+		punches = [("IN", check_in)]
+		if day.overtime_check_in:
+			overtime_check_in = _punch_datetime(day, day.overtime_check_in)
+			overtime_break = overtime_check_in - timedelta(minutes=OVERTIME_BREAK_MINUTES)
+			if check_in < overtime_break and overtime_check_in < check_out:
+				punches += [("OUT", overtime_break), ("IN", overtime_check_in)]
+		punches.append(("OUT", check_out))
+		
+		shift = _checkin_shift_fields(day, shift_timings.get(day.shift_type))
+		for index, (log_type, punch_time) in enumerate(punches, 1):
+			rows.append((
+				_checkin_name(emp.name, day.date, index), standard["owner"], standard["creation"], standard["modified"], standard["modified_by"],
+				emp.name, emp.employee_name, log_type, punch_time, "Fake Attendance Generator", 0, *shift
+			))
+	
+	if plan:
+		# Up to four punches a day: IN, OUT before overtime, overtime IN, OUT
+		frappe.db.sql("""
+			DELETE FROM `tabEmployee Checkin`
+			WHERE name IN %(names)s AND IFNULL(attendance, '') = ''
+		""", {"names": [_checkin_name(emp.name, day.date, index) for day in plan for index in range(1, 5)]})
+	
+	return bulk_upsert(
+		"Employee Checkin",
+		["name", "owner", "creation", "modified", "modified_by", *CHECKIN_FIELDS],
+		rows,
+		["modified", "modified_by"],
+		batcher=batcher
+	)
 
-def _random_time_fast(start_time, end_time):
-	start_minutes = start_time.hour * 60 + start_time.minute
-	end_minutes = end_time.hour * 60 + end_time.minute
-	random_minutes = random.randint(start_minutes, end_minutes)
-	hours = random_minutes // 60
-	minutes = random_minutes % 60
-	return time(hours, minutes)
+def _checkin_name(employee, date, index):
+	return f"FAG-CKIN-{employee}-{date.strftime('%Y%m%d')}-{index}"
 
-def _create_leave_application_fast(doc, emp, date):
-	try:
-		# Check if there's a valid leave allocation for this employee and date
-		leave_allocations = frappe.get_all("Leave Allocation", 
-			filters={
-				"employee": emp.name,
-				"from_date": ["<=", date],
-				"to_date": [">=", date],
-				"docstatus": 1
-			},
-			fields=["leave_type", "from_date", "to_date"],
-			limit=1
-		)
-		
-		if not leave_allocations:
-			log_message(f"No valid leave allocation found for {emp.name} on {date}, skipping leave application", "warning")
-			return
-		
-		leave_allocation = leave_allocations[0]
-		leave_type = leave_allocation.leave_type
-		
-		# Check if there's already a leave application for this date
-		existing_leave = frappe.get_all("Leave Application",
-			filters={
-				"employee": emp.name,
-				"from_date": ["<=", date],
-				"to_date": [">=", date],
-				"docstatus": ["!=", 2]  # Not cancelled
-			},
-			limit=1
-		)
-		
-		if existing_leave:
-			log_message(f"Leave application already exists for {emp.name} on {date}, skipping", "info")
-			return
-		
-		# Create leave application directly
-		leave_doc = frappe.get_doc({
-			"doctype": "Leave Application",
-			"employee": emp.name,
-			"leave_type": leave_type,
-			"from_date": date,
-			"to_date": date,
-			"half_day": 0,
-			"company": doc.company,
-			"status": "Open",
-			"description": "Auto-generated for fake attendance"
-		})
-		leave_doc.insert()
-		log_message(f"Created leave application for {emp.name} on {date}", "success")
-		
-	except Exception as e:
-		log_message(f"Failed to create Leave Application for {emp.name} on {date}: {str(e)}", "error")
+def _check_in_datetime(day):
+	date = add_days(day.date, -1) if day.check_in_previous_day else day.date
+	return datetime.combine(date, day.check_in)
 
-def _insert_batch(docs_batch):
-	"""Insert multiple documents in batch for better performance"""
-	try:
-		log_message(f"🚀 Starting batch insert of {len(docs_batch)} documents", "info")
-		inserted_count = 0
-		
-		for i, doc_data in enumerate(docs_batch):
-			try:
-				log_message(f"📝 Inserting document {i+1}/{len(docs_batch)}: {doc_data.get('doctype')} for {doc_data.get('employee')} on {doc_data.get('attendance_date')}", "info")
-				
-				doc = frappe.get_doc(doc_data)
-				doc.insert()
-				inserted_count += 1
-				
-				log_message(f"✅ Successfully inserted document {i+1}: {doc.name}", "success")
-				
-				if i % 10 == 0:  # Log every 10th document
-					log_message(f"📊 Progress: Inserted {inserted_count}/{len(docs_batch)} documents", "info")
-					
-			except Exception as e:
-				log_message(f"❌ Error inserting document {i+1}: {str(e)}", "error")
-				log_message(f"📋 Document data: {doc_data}", "info")
-				continue
-		
-		log_message(f"🎉 Batch insert completed: {inserted_count}/{len(docs_batch)} documents inserted successfully", "success")
-		return inserted_count
-		
-	except Exception as e:
-		log_message(f"❌ Error in batch insert: {str(e)}", "error")
+def _punch_datetime(day, value):
+	# Punches at or before the check-in time belong to the calendar day after the check-in
+	punch = datetime.combine(_check_in_datetime(day).date(), value)
+	return punch + timedelta(days=1) if value <= day.check_in else punch
+
+def _checkin_shift_fields(day, timings):
+	"""shift, shift_start, shift_end, shift_actual_start, shift_actual_end for a day's punches"""
+	if not timings:
+		return (None, None, None, None, None)
+	
+	midnight = datetime.combine(day.date, time())
+	return (
+		day.shift_type,
+		*(midnight + timedelta(minutes=minutes) for minutes in (timings.start, timings.end, timings.actual_start, timings.actual_end))
+	)
+
+def _process_auto_attendance(shift_types):
+	"""
+	Run HRMS's shift-based attendance marking once for each Shift Type.
+	
+	HRMS only processes Shift Types with auto attendance enabled, and only
+	punches before the Shift Type's last_sync_of_checkin.
+	"""
+	for shift_type in shift_types:
+		try:
+			shift = frappe.get_doc("Shift Type", shift_type)
+			if shift.enable_auto_attendance:
+				shift.process_auto_attendance()
+			frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback()
+			log_message(f"❌ Auto attendance failed for shift {shift_type}: {str(e)}", "error", show_user=False)
+
+def _time_windows(cfg, include_overtime=True, shift=None):
+	"""
+	Describe check-in and check-out times as mixtures of minute ranges.
+	
+	Shared by the generator and the Department Attendance Config simulator,
+	so both always use the same model.
+	
+	With a `shift` (timings from compliance.shifts.get_shift_timings) the
+	config's window widths are kept but anchored on the shift start and
+	end, and clamped to the shift's actual start and end, so HRMS accepts
+	every punch for the shift. Check-out minutes of a shift that crosses
+	midnight are past 1440, i.e. on the next day; check-in minutes of a
+	shift starting around midnight can be negative, i.e. on the previous day.
+	
+	Returns:
+		tuple: (check_in, check_out), each a list of
+			(probability, first_minute, last_minute) components
+	"""
+	check_in_start = _minute_of_day(cfg.check_in_start_time)
+	check_in_end = _minute_of_day(cfg.check_in_end_time)
+	check_out_start = _minute_of_day(cfg.check_out_start_time)
+	check_out_end = _minute_of_day(cfg.check_out_end_time)
+	overtime_start = _minute_of_day(cfg.overtime_start_time) if cfg.overtime_start_time else None
+	overtime_end = _minute_of_day(cfg.overtime_end_time) if cfg.overtime_end_time else None
+	grace = cint(cfg.grace_period_minutes)
+	early_grace = 0
+	
+	if shift:
+		# Same window widths, moved so check-in ends at the shift start and check-out begins at the shift end
+		in_offset = shift.start - check_in_end
+		out_offset = shift.end - check_out_start
+		check_in_start, check_in_end = max(check_in_start + in_offset, shift.actual_start), shift.start
+		check_out_start, check_out_end = shift.end, min(check_out_end + out_offset, shift.actual_end)
+		if overtime_start is not None and overtime_end is not None:
+			overtime_end = min(overtime_end + out_offset, shift.actual_end)
+			overtime_start = min(overtime_start + out_offset, overtime_end)
+		if shift.late_grace is not None:
+			grace = shift.late_grace
+		early_grace = shift.early_grace
+	
+	# Late arrivals come after the check-in window plus the grace period
+	late = _probability(cfg.late_arrival_probability)
+	late_start = min(check_in_end + grace + 1, LAST_MINUTE)
+	check_in = [
+		(1 - late, check_in_start, check_in_end),
+		(late, late_start, min(late_start + LATE_WINDOW_MINUTES - 1, LAST_MINUTE))
+	]
+	
+	# Early exits leave before the check-out window, overtime runs into the overtime window
+	early = _probability(cfg.early_exit_probability)
+	overtime = 0
+	if include_overtime and overtime_start is not None and overtime_end is not None:
+		overtime = min(_probability(cfg.overtime_probability), 1 - early)
+	
+	early_end = max(check_out_start - early_grace - 1, 0)
+	check_out = [
+		(early, max(early_end - EARLY_EXIT_WINDOW_MINUTES + 1, 0), early_end),
+		(overtime, overtime_start if overtime else 0, overtime_end if overtime else 0),
+		(1 - early - overtime, check_out_start, check_out_end)
+	]
+	
+	return check_in, check_out
+
+def _probability(percent):
+	return min(max(flt(percent), 0), 100) / 100
+
+def _minute_of_day(value):
+	value = get_time(value)
+	return value.hour * 60 + value.minute
+
+def _pick_minute(components):
+	"""Draw a minute from the mixture; returns (component index, minute)"""
+	roll = random.random()
+	for index, (probability, first_minute, last_minute) in enumerate(components):
+		if roll < probability:
+			return index, random.randint(first_minute, last_minute)
+		roll -= probability
+	
+	# Rounding left a sliver of probability, use the last component
+	return len(components) - 1, random.randint(components[-1][1], components[-1][2])
+
+def _generate_times_fast(time_windows):
+	"""
+	Return (check_in, check_out, overtime_check_in, check_in_previous_day).
+	
+	overtime_check_in is the overtime window start on overtime days, else
+	None; check_in_previous_day is set for negative check-in minutes.
+	"""
+	check_in, check_out = time_windows
+	_, check_in_minute = _pick_minute(check_in)
+	component, check_out_minute = _pick_minute(check_out)
+	overtime_check_in = None
+	if component == OVERTIME_COMPONENT:
+		overtime_check_in = _minute_to_time(check_out[OVERTIME_COMPONENT][1])
+	
+	return _minute_to_time(check_in_minute), _minute_to_time(check_out_minute), overtime_check_in, check_in_minute < 0
+
+def _minute_to_time(minute):
+	# Minutes past midnight of the next day, or before midnight of the previous one, wrap around
+	return time(minute // 60 % 24, minute % 60)
+
+def _run_leave_phase(company, absent_days):
+	"""
+	Deferred leave phase: create Leave Applications for the absent days of a run.
+	
+	Consecutive absent days become one multi-day application. Allocations,
+	their used balance and already booked days are prefetched for all
+	employees in two queries, so days without an allocation, without
+	balance or overlapping an existing application are dropped before
+	HRMS validation runs. Applications are inserted and committed in
+	batches of LEAVE_BATCH_SIZE, and a batch is retried on lock conflicts.
+	
+	Args:
+		company (str): company set on the applications
+		absent_days (dict): employee -> list of absent dates
+	
+	Returns:
+		int: number of Leave Applications created
+	"""
+	absent_days = {employee: sorted(getdate(date) for date in dates) for employee, dates in absent_days.items() if dates}
+	if not absent_days:
 		return 0
+	
+	employees = list(absent_days)
+	from_date = min(dates[0] for dates in absent_days.values())
+	to_date = max(dates[-1] for dates in absent_days.values())
+	allocations = _get_leave_allocations(employees, from_date, to_date)
+	booked_days = _get_booked_leave_days(employees, from_date, to_date)
+	
+	applications = []
+	skipped = 0
+	for employee, dates in absent_days.items():
+		current = None
+		for date in dates:
+			if date in booked_days.get(employee, ()):
+				continue
+			
+			allocation = next(
+				(a for a in allocations.get(employee, ()) if a.from_date <= date <= a.to_date and a.remaining >= 1),
+				None
+			)
+			if not allocation:
+				skipped += 1
+				continue
+			allocation.remaining -= 1
+			
+			if current and current[1] is allocation and date == add_days(current[3], 1):
+				current[3] = date
+			else:
+				current = [employee, allocation, date, date]
+				applications.append(current)
+	
+	if skipped:
+		log_message(f"⚠️ Skipped {skipped} absent days without a leave allocation or balance", "warning", show_user=False)
+	
+	created = 0
+	for start in range(0, len(applications), LEAVE_BATCH_SIZE):
+		created += _insert_leave_batch_with_retry(company, applications[start:start + LEAVE_BATCH_SIZE])
+	
+	log_message(f"🏠 Created {created} leave applications for {len(absent_days)} employees", "info", show_user=False)
+	return created
+
+def _insert_leave_batch_with_retry(company, batch):
+	"""
+	Insert and commit one batch of Leave Applications, retrying the whole
+	batch on deadlocks and lock wait timeouts; InnoDB rolls the transaction
+	back on those, savepoints included. A batch that keeps failing is
+	skipped so the run's committed attendance is not marked Failed.
+	"""
+	for attempt in range(WRITE_RETRIES + 1):
+		try:
+			created = _insert_leave_batch(company, batch)
+			frappe.db.commit()
+			return created
+		except Exception as e:
+			frappe.db.rollback()
+			if not is_retryable_write_error(e):
+				raise
+			if attempt == WRITE_RETRIES:
+				log_message(f"Skipped {len(batch)} Leave Applications after repeated lock conflicts: {str(e)}", "error", show_user=False)
+				return 0
+			log_message(f"🔁 Lock conflict in the leave phase, retrying {len(batch)} applications", "warning", show_user=False)
+			sleep(retry_delay(attempt))
+
+def _insert_leave_batch(company, batch):
+	created = 0
+	for employee, allocation, leave_from, leave_to in batch:
+		try:
+			frappe.db.savepoint("leave_application")
+			frappe.get_doc({
+				"doctype": "Leave Application",
+				"employee": employee,
+				"leave_type": allocation.leave_type,
+				"from_date": leave_from,
+				"to_date": leave_to,
+				"half_day": 0,
+				"company": company,
+				"status": "Open",
+				"description": "Auto-generated for fake attendance"
+			}).insert()
+			created += 1
+		except Exception as e:
+			if is_retryable_write_error(e):
+				raise
+			log_message(f"Failed to create Leave Application for {employee} ({leave_from} to {leave_to}): {str(e)}", "error", show_user=False)
+			frappe.db.rollback(save_point="leave_application")
+	return created
+
+def create_leave_applications(company, absent_days):
+	"""Background job for the leave phase when it is queued separately"""
+	return _run_leave_phase(company, absent_days)
+
+def _get_leave_allocations(employees, from_date, to_date):
+	"""Return {employee: [allocation]} with the remaining balance of each submitted allocation"""
+	allocations = {}
+	for allocation in frappe.db.sql("""
+		SELECT la.employee, la.leave_type, la.from_date, la.to_date,
+			la.total_leaves_allocated - IFNULL((
+				SELECT SUM(app.total_leave_days) FROM `tabLeave Application` app
+				WHERE app.employee = la.employee
+					AND app.leave_type = la.leave_type
+					AND app.docstatus < 2
+					AND app.status != 'Rejected'
+					AND app.from_date >= la.from_date
+					AND app.to_date <= la.to_date
+			), 0) AS remaining
+		FROM `tabLeave Allocation` la
+		WHERE la.docstatus = 1
+			AND la.employee IN %(employees)s
+			AND la.from_date <= %(to_date)s
+			AND la.to_date >= %(from_date)s
+		ORDER BY la.from_date
+	""", {"employees": employees, "from_date": from_date, "to_date": to_date}, as_dict=True):
+		allocations.setdefault(allocation.employee, []).append(allocation)
+	
+	return allocations
+
+def _get_booked_leave_days(employees, from_date, to_date):
+	"""Return {employee: set(dates)} already covered by a Leave Application that is not cancelled"""
+	booked = {}
+	for application in frappe.get_all("Leave Application",
+		filters={
+			"employee": ["in", employees],
+			"from_date": ["<=", to_date],
+			"to_date": [">=", from_date],
+			"docstatus": ["!=", 2]  # Not cancelled
+		},
+		fields=["employee", "from_date", "to_date"]
+	):
+		date = max(getdate(application.from_date), from_date)
+		while date <= min(getdate(application.to_date), to_date):
+			booked.setdefault(application.employee, set()).add(date)
+			date = add_days(date, 1)
+	
+	return booked
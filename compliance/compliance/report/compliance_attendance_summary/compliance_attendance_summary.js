@@ -0,0 +1,43 @@
+// Copyright (c) 2025, mohtashi and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Compliance Attendance Summary"] = {
+	filters: [
+		{
+			fieldname: "company",
+			label: __("Company"),
+			fieldtype: "Link",
+			options: "Company",
+			default: frappe.defaults.get_user_default("Company"),
+			reqd: 1,
+		},
+		{
+			fieldname: "month",
+			label: __("Month"),
+			fieldtype: "Select",
+			options: moment.months().join("\n"),
+			default: moment().format("MMMM"),
+			reqd: 1,
+		},
+		{
+			fieldname: "year",
+			label: __("Year"),
+			fieldtype: "Int",
+			default: moment().year(),
+			reqd: 1,
+		},
+		{
+			fieldname: "department",
+			label: __("Department"),
+			fieldtype: "Link",
+			options: "Department",
+		},
+		{
+			fieldname: "group_by",
+			label: __("Group By"),
+			fieldtype: "Select",
+			options: "Department\nEmployee",
+			default: "Department",
+		},
+	],
+};
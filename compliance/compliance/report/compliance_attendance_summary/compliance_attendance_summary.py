@@ -0,0 +1,153 @@
+# Copyright (c) 2025, mohtashi and contributors
+# For license information, please see license.txt
+
+from datetime import date, datetime
+
+import frappe
+from frappe import _
+from frappe.utils import flt, get_last_day
+
+from compliance.utils import get_daily_attendance_doctype
+
+CACHE_PREFIX = "compliance_attendance_summary"
+# Generation runs clear the cache when they finish; this only bounds staleness
+# after direct edits to Employee Attendance
+CACHE_TTL = 6 * 60 * 60
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	if not (filters.company and filters.month and filters.year):
+		return get_columns(filters), []
+
+	cache_key = _cache_key(filters)
+	data = frappe.cache().get_value(cache_key)
+	if data is None:
+		data = get_data(filters)
+		frappe.cache().set_value(cache_key, data, expires_in_sec=CACHE_TTL)
+
+	return get_columns(filters), data
+
+
+def clear_summary_cache(company=None):
+	"""Drop cached summaries, for one company or all; called when a generation run finishes"""
+	frappe.cache().delete_keys(f"{CACHE_PREFIX}::{company}::" if company else f"{CACHE_PREFIX}::")
+
+
+def _cache_key(filters):
+	return "::".join(
+		[
+			CACHE_PREFIX,
+			filters.company,
+			str(filters.year),
+			filters.month,
+			filters.department or "",
+			filters.group_by or "Department",
+		]
+	)
+
+
+def get_columns(filters):
+	columns = []
+	if filters.get("group_by") == "Employee":
+		columns += [
+			{"label": _("Employee"), "fieldname": "employee", "fieldtype": "Link", "options": "Employee", "width": 140},
+			{"label": _("Employee Name"), "fieldname": "employee_name", "fieldtype": "Data", "width": 180},
+		]
+	columns += [
+		{"label": _("Department"), "fieldname": "department", "fieldtype": "Link", "options": "Department", "width": 180},
+	]
+	if filters.get("group_by") != "Employee":
+		columns += [{"label": _("Employees"), "fieldname": "employees", "fieldtype": "Int", "width": 100}]
+
+	columns += [
+		{"label": _("Present"), "fieldname": "present_days", "fieldtype": "Int", "width": 90},
+		{"label": _("Absent"), "fieldname": "absent_days", "fieldtype": "Int", "width": 90},
+		{"label": _("Late"), "fieldname": "late_days", "fieldtype": "Int", "width": 90},
+		{"label": _("Log Days"), "fieldname": "log_days", "fieldtype": "Int", "width": 90},
+		{"label": _("Working Hours"), "fieldname": "working_hours", "fieldtype": "Float", "precision": 2, "width": 120},
+		{"label": _("Overtime Hours"), "fieldname": "overtime_hours", "fieldtype": "Float", "precision": 2, "width": 120},
+		{"label": _("Avg Hours / Day"), "fieldname": "average_hours", "fieldtype": "Float", "precision": 2, "width": 120},
+	]
+	return columns
+
+
+def get_data(filters):
+	daily_doctype = get_daily_attendance_doctype()
+	if not daily_doctype:
+		return []
+
+	month = datetime.strptime(filters.month, "%B").month
+	from_date = date(int(filters.year), month, 1)
+	values = {
+		"company": filters.company,
+		"month": filters.month,
+		"year": filters.year,
+		"from_date": from_date,
+		"to_date": get_last_day(from_date),
+		"department": filters.department,
+	}
+	department_condition = "AND ea.department = %(department)s" if filters.department else ""
+	by_employee = filters.group_by == "Employee"
+
+	# A check-out at or before the check-in is on the next day, as in _daily_record_data
+	worked_seconds = """IFNULL(TIME_TO_SEC(TIMEDIFF(NULLIF(d.check_out_1, ''), NULLIF(d.check_in_1, '')))
+		+ IF(TIME(NULLIF(d.check_out_1, '')) <= TIME(NULLIF(d.check_in_1, '')), 86400, 0), 0)"""
+
+	# One row per employee-month, computed from the daily rows
+	employee_rows = f"""
+		SELECT
+			ea.employee,
+			MAX(ea.employee_name) AS employee_name,
+			ea.department,
+			SUM(d.present) AS present_days,
+			SUM(d.absent) AS absent_days,
+			SUM(CASE WHEN d.present = 1
+				AND NULLIF(d.check_in_1, '') > ADDTIME(cfg.check_in_end_time, SEC_TO_TIME(IFNULL(cfg.grace_period_minutes, 0) * 60))
+				THEN 1 ELSE 0 END) AS late_days,
+			SUM({worked_seconds}) / 3600 AS working_hours,
+			SUM(GREATEST({worked_seconds} / 3600 - IFNULL(cfg.overtime_threshold_hours, 8.5), 0)) AS overtime_hours
+		FROM `tabEmployee Attendance` ea
+		JOIN `tab{daily_doctype}` d
+			ON d.parent = ea.name AND d.parenttype = 'Employee Attendance' AND d.parentfield = 'table1'
+		LEFT JOIN `tabDepartment Attendance Config` cfg ON cfg.department = ea.department
+		WHERE ea.company = %(company)s AND ea.month = %(month)s AND ea.year = %(year)s
+			{department_condition}
+		GROUP BY ea.employee, ea.department
+	"""
+	log_rows = """
+		SELECT employee, COUNT(DISTINCT attendance_date) AS log_days
+		FROM `tabAttendance Logs`
+		WHERE company = %(company)s AND attendance_date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY employee
+	"""
+
+	if by_employee:
+		query = f"""
+			SELECT e.*, IFNULL(l.log_days, 0) AS log_days
+			FROM ({employee_rows}) e
+			LEFT JOIN ({log_rows}) l ON l.employee = e.employee
+			ORDER BY e.department, e.employee
+		"""
+	else:
+		query = f"""
+			SELECT
+				e.department,
+				COUNT(*) AS employees,
+				SUM(e.present_days) AS present_days,
+				SUM(e.absent_days) AS absent_days,
+				SUM(e.late_days) AS late_days,
+				SUM(IFNULL(l.log_days, 0)) AS log_days,
+				SUM(e.working_hours) AS working_hours,
+				SUM(e.overtime_hours) AS overtime_hours
+			FROM ({employee_rows}) e
+			LEFT JOIN ({log_rows}) l ON l.employee = e.employee
+			GROUP BY e.department
+			ORDER BY e.department
+		"""
+
+	data = frappe.db.sql(query, values, as_dict=True)
+	for row in data:
+		row.average_hours = flt(row.working_hours) / row.present_days if row.present_days else 0
+
+	return data
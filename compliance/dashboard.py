@@ -0,0 +1,125 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Cached aggregates behind the Compliance workspace number cards and chart.
+
+The workspace only ever reads the cached values. Attendance Log totals
+are recomputed when a generation run finishes. Run counts are recomputed
+whenever a run starts, queues or finishes. On a cold cache the getters
+queue one refresh and show zero instead of scanning inline.
+"""
+
+import frappe
+from frappe.utils import add_days, get_first_day, getdate
+
+STATS_CACHE_KEY = "compliance_workspace_stats"
+# Days shown in the generated logs chart
+CHART_DAYS = 30
+
+
+def refresh_workspace_stats():
+	"""Recompute every workspace aggregate; called when a generation run finishes"""
+	today = getdate()
+	month_start = get_first_day(today)
+	chart_start = add_days(today, -(CHART_DAYS - 1))
+
+	daily = frappe.db.sql(
+		"""
+		SELECT attendance_date, COUNT(*)
+		FROM `tabAttendance Logs`
+		WHERE attendance_date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY attendance_date
+		""",
+		{"from_date": min(month_start, chart_start), "to_date": today},
+	)
+	per_day = {getdate(day): count for day, count in daily}
+
+	employees_covered = frappe.db.sql(
+		"""
+		SELECT COUNT(DISTINCT employee)
+		FROM `tabAttendance Logs`
+		WHERE attendance_date BETWEEN %(from_date)s AND %(to_date)s
+		""",
+		{"from_date": month_start, "to_date": today},
+	)[0][0]
+
+	stats = _get_stats() or {}
+	stats.update(
+		{
+			"logs_this_month": sum(count for day, count in per_day.items() if day >= month_start),
+			"employees_covered": employees_covered,
+			"chart_labels": [str(add_days(chart_start, offset)) for offset in range(CHART_DAYS)],
+			"chart_values": [per_day.get(add_days(chart_start, offset), 0) for offset in range(CHART_DAYS)],
+		}
+	)
+	stats.update(_get_run_counts())
+	frappe.cache().set_value(STATS_CACHE_KEY, stats)
+
+
+def refresh_run_counts():
+	"""Recompute only the run counts, which are cheap; called when a run starts or queues"""
+	stats = _get_stats()
+	if stats is None:
+		_queue_refresh()
+		return
+
+	stats.update(_get_run_counts())
+	frappe.cache().set_value(STATS_CACHE_KEY, stats)
+
+
+def _get_run_counts():
+	counts = dict(
+		frappe.db.sql(
+			"""
+			SELECT status, COUNT(*) FROM `tabFake Attendance Generator`
+			WHERE status IN ('Queued', 'In Progress', 'Failed')
+			GROUP BY status
+			"""
+		)
+	)
+	return {
+		"runs_in_progress": counts.get("Queued", 0) + counts.get("In Progress", 0),
+		"failed_runs": counts.get("Failed", 0),
+	}
+
+
+def _get_stats():
+	return frappe.cache().get_value(STATS_CACHE_KEY)
+
+
+def _queue_refresh():
+	frappe.enqueue(
+		"compliance.dashboard.refresh_workspace_stats",
+		queue="long",
+		job_id=STATS_CACHE_KEY,
+		deduplicate=True,
+	)
+
+
+def get_stat(key):
+	stats = _get_stats()
+	if stats is None:
+		_queue_refresh()
+		return 0
+	return stats.get(key, 0)
+
+
+@frappe.whitelist()
+def get_logs_this_month(filters=None):
+	return {"value": get_stat("logs_this_month"), "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_employees_covered(filters=None):
+	return {"value": get_stat("employees_covered"), "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_runs_in_progress(filters=None):
+	return {"value": get_stat("runs_in_progress"), "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_failed_runs(filters=None):
+	return {"value": get_stat("failed_runs"), "fieldtype": "Int"}
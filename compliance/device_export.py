@@ -0,0 +1,169 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Export Attendance Logs as raw biometric device dump files.
+
+Each log's `attendance` field already holds the device line, so the export
+streams that column through an unbuffered (server-side) cursor and writes
+it in chunks. Memory stays constant however many lines a scope has, and no
+documents are built. Files go to the site's private files folder.
+"""
+
+import gzip
+import os
+
+import frappe
+from frappe.utils import cint, getdate
+
+from compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator import log_message
+
+# Lines buffered per file before each write
+WRITE_CHUNK_LINES = 10_000
+EXPORT_FOLDER = "device_exports"
+NO_BRANCH = "No Branch"
+
+
+@frappe.whitelist()
+def enqueue_device_export(company, from_date, to_date, department=None, compress=0, split_by_branch=0):
+	"""Queue a device export; the file paths are pushed to the user when it finishes"""
+	frappe.only_for(["System Manager", "HR Manager"])
+	frappe.enqueue(
+		"compliance.device_export.export_device_logs",
+		queue="long",
+		timeout=3600,
+		job_name=f"Export Device Logs - {company} {from_date} to {to_date}",
+		company=company,
+		from_date=from_date,
+		to_date=to_date,
+		department=department,
+		compress=cint(compress),
+		split_by_branch=cint(split_by_branch),
+		notify_user=frappe.session.user,
+	)
+	return {"status": "queued"}
+
+
+def export_device_logs(
+	company,
+	from_date,
+	to_date,
+	department=None,
+	compress=False,
+	split_by_branch=False,
+	output_dir=None,
+	notify_user=None,
+):
+	"""
+	Write the Attendance Logs of a scope to device-format text files.
+
+	Args:
+		company (str): company whose logs are exported
+		from_date, to_date: attendance date range, inclusive
+		department (str): only export this department
+		compress (bool): gzip the files
+		split_by_branch (bool): one file per employee branch instead of a single file
+		output_dir (str): target folder, defaults to private/files/device_exports
+
+	Returns:
+		dict: file path -> lines written
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	output_dir = output_dir or frappe.get_site_path("private", "files", EXPORT_FOLDER)
+	os.makedirs(output_dir, exist_ok=True)
+
+	conditions = ["logs.company = %(company)s", "logs.attendance_date BETWEEN %(from_date)s AND %(to_date)s"]
+	if department:
+		conditions.append("logs.department = %(department)s")
+
+	# Punches in device order, by the timestamp of the device line itself. Lines
+	# that do not parse fall back to the shift date, where a check-out at or
+	# before the day's check-in was on the next day
+	check_in_join = f"""
+		LEFT JOIN (
+			SELECT employee, attendance_date, MIN(attendance_time) AS check_in
+			FROM `tabAttendance Logs` logs
+			WHERE {" AND ".join(conditions)} AND logs.log_type = 'Check In'
+			GROUP BY employee, attendance_date
+		) check_ins ON check_ins.employee = logs.employee AND check_ins.attendance_date = logs.attendance_date
+	"""
+	punch_time = """COALESCE(
+		STR_TO_DATE(LEFT(SUBSTRING_INDEX(logs.attendance, ' : ', -1), 19), '%%Y-%%m-%%d %%H:%%i:%%s'),
+		TIMESTAMP(logs.attendance_date, logs.attendance_time)
+			+ INTERVAL IF(logs.log_type = 'Check Out' AND logs.attendance_time <= check_ins.check_in, 1, 0) DAY
+	)"""
+
+	branch_join = "LEFT JOIN `tabEmployee` employee ON employee.name = logs.employee" if split_by_branch else ""
+	branch_column = "IFNULL(employee.branch, '')" if split_by_branch else "''"
+
+	base_name = f"{frappe.scrub(company)}_{from_date}_{to_date}"
+	if department:
+		base_name += f"_{frappe.scrub(department)}"
+
+	writers = {}
+	try:
+		with frappe.db.unbuffered_cursor():
+			rows = frappe.db.sql(
+				f"""
+				SELECT logs.attendance, {branch_column}
+				FROM `tabAttendance Logs` logs
+				{check_in_join}
+				{branch_join}
+				WHERE {" AND ".join(conditions)}
+					AND IFNULL(logs.attendance, '') != ''
+				ORDER BY {punch_time}
+				""",
+				{"company": company, "from_date": from_date, "to_date": to_date, "department": department},
+				as_iterator=True,
+			)
+
+			for line, branch in rows:
+				writer = writers.get(branch)
+				if writer is None:
+					file_name = f"{base_name}_{frappe.scrub(branch or NO_BRANCH)}" if split_by_branch else base_name
+					writer = writers[branch] = _ChunkedWriter(os.path.join(output_dir, file_name), compress)
+				writer.write(line)
+	finally:
+		for writer in writers.values():
+			writer.close()
+
+	files = {writer.path: writer.lines for writer in writers.values()}
+	log_message(
+		f"📤 Exported {sum(files.values())} device lines for {company} ({from_date} to {to_date}) to {len(files)} file(s)",
+		"info",
+		show_user=False,
+	)
+
+	if notify_user:
+		frappe.publish_realtime(
+			"device_export_completed",
+			{"files": [os.path.basename(path) for path in files], "lines": sum(files.values())},
+			user=notify_user,
+		)
+
+	return files
+
+
+class _ChunkedWriter:
+	"""Buffers lines for one output file and writes them WRITE_CHUNK_LINES at a time"""
+
+	def __init__(self, path, compress=False):
+		self.path = f"{path}.txt.gz" if compress else f"{path}.txt"
+		self.file = gzip.open(self.path, "wt", encoding="utf-8") if compress else open(self.path, "w", encoding="utf-8")
+		self.buffer = []
+		self.lines = 0
+
+	def write(self, line):
+		self.buffer.append(line)
+		if len(self.buffer) >= WRITE_CHUNK_LINES:
+			self.flush()
+
+	def flush(self):
+		if self.buffer:
+			self.file.write("\n".join(self.buffer) + "\n")
+			self.lines += len(self.buffer)
+			self.buffer = []
+
+	def close(self):
+		self.flush()
+		self.file.close()
@@ -122,34 +122,24 @@ app_license = "mit"
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-# 	"*": {
-# 		"on_update": "method",
-# 		"on_cancel": "method",
-# 		"on_trash": "method"
-# 	}
-# }
+doc_events = {
+	"Shift Type": {
+		"on_update": "compliance.shifts.clear_shift_type_cache",
+		"on_trash": "compliance.shifts.clear_shift_type_cache",
+	}
+}
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"compliance.tasks.all"
-# 	],
-# 	"daily": [
-# 		"compliance.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"compliance.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"compliance.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"compliance.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"all": [
+		"compliance.run_locks.start_queued_runs"
+	],
+	"daily_long": [
+		"compliance.tasks.generate_daily_attendance"
+	],
+}
 
 # Testing
 # -------
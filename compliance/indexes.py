@@ -0,0 +1,180 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import frappe
+
+from compliance.utils import get_child_doctype
+
+# (doctype, columns, index name) for the generator's per-day lookups.
+# Child table doctypes are given as "<parent doctype>.<table fieldname>"
+# and resolved from the parent's meta, since they belong to another app.
+GENERATOR_INDEXES = [
+	("Attendance Logs", ["employee", "attendance_date", "log_type"], "employee_date_log_type_index"),
+	("Employee Attendance", ["employee", "month", "year"], "employee_month_year_index"),
+	("Leave Allocation", ["employee", "from_date", "to_date"], "employee_from_to_date_index"),
+	("Leave Application", ["employee", "from_date", "to_date"], "employee_from_to_date_index"),
+	("Employee Attendance.table1", ["parent", "date"], "parent_date_index"),
+	# Date range aggregates behind the workspace number cards (compliance.dashboard)
+	("Attendance Logs", ["attendance_date"], "attendance_date_index"),
+]
+
+# Natural keys that make generator writes idempotent (see compliance.utils.bulk_upsert).
+# Attendance Logs has none: it holds real biometric punches, where two
+# same-type punches on one day are valid; generated logs upsert on name.
+NATURAL_KEYS = [
+	("Employee Attendance.table1", ["parent", "date"], "parent_date_key"),
+]
+
+# (doctype, columns) of natural keys seen enforced; keys are never dropped at runtime
+_enforced_keys = set()
+
+# Keys enforced by earlier versions that must not exist
+OBSOLETE_KEYS = [
+	("Attendance Logs", "employee_date_log_type_key"),
+]
+
+
+def _resolve_doctype(doctype):
+	if "." not in doctype:
+		return doctype
+
+	return get_child_doctype(*doctype.split(".", 1))
+
+
+def _get_index_columns(doctype, unique=False):
+	"""Return {index name: [columns in index order]} for a doctype's table"""
+	indexes = {}
+	for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+		if unique and row.Non_unique:
+			continue
+		indexes.setdefault(row.Key_name, []).append((row.Seq_in_index, row.Column_name))
+	return {name: [column for _, column in sorted(columns)] for name, columns in indexes.items()}
+
+
+def get_missing_indexes():
+	"""
+	Return the generator indexes that are not covered on this site.
+
+	An index counts as present when any existing index starts with the
+	same columns. Doctypes whose tables do not exist are skipped.
+	"""
+	missing = []
+	for doctype, columns, index_name in GENERATOR_INDEXES:
+		resolved = _resolve_doctype(doctype)
+		if not resolved or not frappe.db.table_exists(resolved):
+			continue
+
+		existing = _get_index_columns(resolved)
+		if not any(index_columns[: len(columns)] == columns for index_columns in existing.values()):
+			missing.append(frappe._dict(doctype=resolved, columns=columns, index_name=index_name))
+
+	return missing
+
+
+def get_missing_natural_keys():
+	"""Return the natural unique keys that are not enforced on this site"""
+	missing = []
+	for doctype, columns, key_name in NATURAL_KEYS:
+		resolved = _resolve_doctype(doctype)
+		if not resolved or not frappe.db.table_exists(resolved):
+			continue
+
+		if columns not in _get_index_columns(resolved, unique=True).values():
+			missing.append(frappe._dict(doctype=resolved, columns=columns, index_name=key_name, unique=1))
+
+	return missing
+
+
+def is_natural_key_enforced(doctype, columns):
+	"""Whether a unique key on exactly `columns` exists; positive answers are cached for the process"""
+	if (doctype, tuple(columns)) in _enforced_keys:
+		return True
+
+	if columns in _get_index_columns(doctype, unique=True).values():
+		_enforced_keys.add((doctype, tuple(columns)))
+		return True
+	return False
+
+
+def add_missing_natural_keys():
+	"""
+	Enforce the natural unique keys that can be added without losing data.
+
+	Rows are never deleted: a table that already has duplicate keys is left
+	without the key and stays reported by check_indexes until an
+	administrator resolves the duplicates.
+
+	Returns:
+		list: the keys added
+	"""
+	added = []
+	for key in get_missing_natural_keys():
+		columns = ", ".join(f"`{column}`" for column in key.columns)
+		if frappe.db.sql(
+			f"SELECT 1 FROM `tab{key.doctype}` GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1"
+		):
+			print(f"Skipping unique key {key.index_name} on {key.doctype}: duplicate rows exist")
+			continue
+
+		frappe.db.sql(f"ALTER TABLE `tab{key.doctype}` ADD UNIQUE INDEX `{key.index_name}` ({columns})")
+		added.append(key)
+
+	if added:
+		drop_redundant_indexes()
+	return added
+
+
+def drop_redundant_indexes():
+	"""
+	Drop generator lookup indexes that a unique key already covers.
+
+	The lookup indexes are added before the natural keys, so a table can
+	end up with a plain and a unique index on the same columns; keeping
+	both only doubles index maintenance on every write.
+
+	Returns:
+		list: the indexes dropped
+	"""
+	dropped = []
+	for doctype, columns, index_name in GENERATOR_INDEXES:
+		resolved = _resolve_doctype(doctype)
+		if not resolved or not frappe.db.table_exists(resolved):
+			continue
+
+		unique = _get_index_columns(resolved, unique=True)
+		if index_name in unique or index_name not in _get_index_columns(resolved):
+			continue
+
+		if any(key_columns[: len(columns)] == columns for key_columns in unique.values()):
+			frappe.db.sql(f"ALTER TABLE `tab{resolved}` DROP INDEX `{index_name}`")
+			dropped.append(frappe._dict(doctype=resolved, columns=columns, index_name=index_name))
+
+	return dropped
+
+
+def drop_obsolete_keys():
+	"""Drop unique keys that earlier versions enforced and return the ones dropped"""
+	dropped = []
+	for doctype, key_name in OBSOLETE_KEYS:
+		if not frappe.db.table_exists(doctype) or key_name not in _get_index_columns(doctype):
+			continue
+
+		frappe.db.sql(f"ALTER TABLE `tab{doctype}` DROP INDEX `{key_name}`")
+		dropped.append(frappe._dict(doctype=doctype, index_name=key_name))
+
+	return dropped
+
+
+def add_missing_indexes():
+	"""Create every missing generator index and return the ones added"""
+	missing = get_missing_indexes()
+	for index in missing:
+		frappe.db.add_index(index.doctype, index.columns, index.index_name)
+	return missing
+
+
+@frappe.whitelist()
+def check_indexes():
+	"""Report generator indexes and natural keys that are missing on this site"""
+	frappe.only_for("System Manager")
+	return get_missing_natural_keys() + get_missing_indexes()
@@ -0,0 +1,5 @@
+from compliance.indexes import add_missing_indexes
+
+
+def execute():
+	add_missing_indexes()
@@ -0,0 +1,5 @@
+from compliance.indexes import add_missing_natural_keys
+
+
+def execute():
+	add_missing_natural_keys()
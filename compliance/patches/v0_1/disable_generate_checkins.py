@@ -0,0 +1,7 @@
+import frappe
+
+
+def execute():
+	# The flag defaulted to 1 while it did nothing; now that it writes Employee
+	# Checkins and runs HRMS auto attendance it must be turned on explicitly
+	frappe.db.sql("UPDATE `tabFake Attendance Generator` SET generate_checkins = 0")
@@ -0,0 +1,5 @@
+from compliance.indexes import drop_obsolete_keys
+
+
+def execute():
+	drop_obsolete_keys()
@@ -0,0 +1,5 @@
+from compliance.indexes import drop_redundant_indexes
+
+
+def execute():
+	drop_redundant_indexes()
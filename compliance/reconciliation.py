@@ -0,0 +1,206 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import get_time, getdate
+
+from compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator import (
+	EMPLOYEE_FIELDS,
+	DayPlan,
+	_create_employee_attendance_fast,
+	_upsert_daily_rows,
+	log_message,
+)
+from compliance.compliance.report.compliance_attendance_summary.compliance_attendance_summary import (
+	clear_summary_cache,
+)
+from compliance.dashboard import refresh_workspace_stats
+from compliance.run_locks import acquire_scope_lock, release_scope_lock
+from compliance.utils import get_daily_attendance_doctype
+
+# Employees compared per query
+RECONCILE_CHUNK_SIZE = 200
+# Mismatches returned to the caller, the counts always cover all of them
+SAMPLE_SIZE = 100
+
+MISSING_ROW = "Missing Row"
+MARKED_ABSENT = "Marked Absent"
+TIME_MISMATCH = "Time Mismatch"
+MISSING_LOGS = "Missing Logs"
+
+
+@frappe.whitelist()
+def enqueue_reconciliation(company, from_date, to_date, department=None, fix=0):
+	"""Queue a reconciliation run; the summary is pushed to the user when it finishes"""
+	frappe.only_for(["System Manager", "HR Manager"])
+	frappe.enqueue(
+		"compliance.reconciliation.reconcile_attendance",
+		queue="long",
+		timeout=3600,
+		job_name=f"Reconcile Attendance - {company} {from_date} to {to_date}",
+		company=company,
+		from_date=from_date,
+		to_date=to_date,
+		department=department,
+		fix=frappe.utils.cint(fix),
+		notify_user=frappe.session.user,
+	)
+	return {"status": "queued"}
+
+
+def reconcile_attendance(company, from_date, to_date, department=None, fix=False, notify_user=None):
+	"""
+	Compare Attendance Logs with Employee Attendance `table1` rows per employee and date.
+
+	Works in employee chunks with set-based SQL and never loads documents.
+	With `fix`, Attendance Logs are taken as the source of truth and the
+	daily rows are rewritten in bulk: days with logs get the logged times,
+	present weekdays without any logs are marked absent. Weekly Off and
+	holiday rows, and employee-months without any logs (never generated
+	from logs, e.g. by Compliance Attendance Generate), are left alone.
+	Fixing takes the run lock of the scope; while a generation run
+	overlaps it, mismatches are only reported and `blocked_by` names the
+	blocking runs.
+
+	Returns:
+		dict: mismatch counts by issue, rows fixed, a sample of mismatches and blocked_by
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	lock_name = f"Reconciliation - {company} {department or ''}".strip()
+	blocked_by = acquire_scope_lock(lock_name, company, department, from_date, to_date) if fix else []
+	try:
+		return _reconcile(company, from_date, to_date, department, fix and not blocked_by, blocked_by, notify_user)
+	finally:
+		if fix and not blocked_by:
+			release_scope_lock(lock_name)
+
+
+def _reconcile(company, from_date, to_date, department, fix, blocked_by, notify_user):
+	filters = {"company": company}
+	if department:
+		filters["department"] = department
+	employees = frappe.get_all("Employee", filters=filters, pluck="name", order_by="name")
+
+	summary = frappe._dict(employees=len(employees), mismatches={}, fixed=0, sample=[], blocked_by=blocked_by)
+	for start in range(0, len(employees), RECONCILE_CHUNK_SIZE):
+		chunk = employees[start : start + RECONCILE_CHUNK_SIZE]
+		mismatches = _get_mismatches(chunk, from_date, to_date)
+
+		for row in mismatches:
+			summary.mismatches[row.issue] = summary.mismatches.get(row.issue, 0) + 1
+			if len(summary.sample) < SAMPLE_SIZE:
+				summary.sample.append(row)
+
+		if fix and mismatches:
+			summary.fixed += _fix_mismatches(company, mismatches)
+			frappe.db.commit()
+
+	if summary.fixed:
+		clear_summary_cache(company)
+		refresh_workspace_stats()
+
+	log_message(
+		f"🔎 Reconciled {len(employees)} employees ({from_date} to {to_date}): {summary.mismatches or 'no mismatches'}, fixed {summary.fixed}"
+		+ (f", not fixed while {', '.join(blocked_by)} runs" if blocked_by else ""),
+		"info",
+		show_user=False,
+	)
+	if notify_user:
+		frappe.publish_realtime("attendance_reconciliation_completed", summary, user=notify_user)
+
+	return summary
+
+
+def _get_mismatches(employees, from_date, to_date):
+	daily_doctype = get_daily_attendance_doctype()
+	values = {"employees": employees, "from_date": from_date, "to_date": to_date}
+	daily_rows = f"""
+		SELECT ea.employee, ea.name AS parent, d.date, d.check_in_1, d.check_out_1, d.absent, d.present, d.day_type
+		FROM `tabEmployee Attendance` ea
+		JOIN `tab{daily_doctype}` d
+			ON d.parent = ea.name AND d.parenttype = 'Employee Attendance' AND d.parentfield = 'table1'
+		WHERE ea.employee IN %(employees)s AND d.date BETWEEN %(from_date)s AND %(to_date)s
+	"""
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT l.employee, l.attendance_date AS date, 1 AS has_logs, l.check_in, l.check_out,
+			r.parent, r.check_in_1, r.check_out_1, r.absent
+		FROM (
+			SELECT employee, attendance_date,
+				MIN(CASE WHEN log_type = 'Check In' THEN attendance_time END) AS check_in,
+				MAX(CASE WHEN log_type = 'Check Out' THEN attendance_time END) AS check_out
+			FROM `tabAttendance Logs`
+			WHERE employee IN %(employees)s AND attendance_date BETWEEN %(from_date)s AND %(to_date)s
+			GROUP BY employee, attendance_date
+		) l
+		LEFT JOIN ({daily_rows}) r ON r.employee = l.employee AND r.date = l.attendance_date
+		WHERE r.parent IS NULL
+			OR r.absent = 1
+			OR NOT (TIME(NULLIF(r.check_in_1, '')) <=> l.check_in)
+			OR NOT (TIME(NULLIF(r.check_out_1, '')) <=> l.check_out)
+
+		UNION ALL
+
+		SELECT r.employee, r.date, 0, NULL, NULL, r.parent, r.check_in_1, r.check_out_1, r.absent
+		FROM ({daily_rows}) r
+		WHERE r.absent = 0
+			AND r.present = 1
+			AND r.day_type = 'Weekday'
+			AND NOT EXISTS (
+				SELECT 1 FROM `tabAttendance Logs` l
+				WHERE l.employee = r.employee AND l.attendance_date = r.date
+			)
+			AND EXISTS (
+				SELECT 1 FROM `tabAttendance Logs` l
+				WHERE l.employee = r.employee
+					AND l.attendance_date BETWEEN r.date - INTERVAL (DAYOFMONTH(r.date) - 1) DAY AND LAST_DAY(r.date)
+			)
+		""",
+		values,
+		as_dict=True,
+	)
+
+	for row in rows:
+		if not row.has_logs:
+			row.issue = MISSING_LOGS
+		elif not row.parent:
+			row.issue = MISSING_ROW
+		elif row.absent:
+			row.issue = MARKED_ABSENT
+		else:
+			row.issue = TIME_MISMATCH
+
+	return rows
+
+
+def _fix_mismatches(company, mismatches):
+	"""Rewrite the daily rows for mismatched days from the logs, one bulk upsert per parent"""
+	employees = {
+		emp.name: emp
+		for emp in frappe.get_all(
+			"Employee", filters={"name": ["in", list({row.employee for row in mismatches})]}, fields=EMPLOYEE_FIELDS
+		)
+	}
+	settings = frappe._dict(company=company)
+
+	days_by_parent = {}
+	for row in mismatches:
+		date = getdate(row.date)
+		if row.has_logs:
+			day = DayPlan(
+				date,
+				get_time(row.check_in) if row.check_in is not None else None,
+				get_time(row.check_out) if row.check_out is not None else None,
+				False,
+			)
+		else:
+			day = DayPlan(date, None, None, True)
+
+		parent = row.parent or _create_employee_attendance_fast(
+			settings, employees[row.employee], date.strftime("%B"), date.year
+		)
+		if parent:
+			days_by_parent.setdefault(parent, []).append(day)
+
+	return sum(_upsert_daily_rows(parent, days) for parent, days in days_by_parent.items())
@@ -0,0 +1,264 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Scope locks for attendance generation.
+
+A run's scope is (company, department, date range). Fake Attendance
+Generator runs whose scope overlaps a held lock are queued and started in
+request order once the overlap clears; runs that do not overlap start
+immediately and proceed in parallel. Compliance Attendance Generate runs
+synchronously, so it refuses to start instead of queueing. Lock state is
+stored on the documents themselves (lock_status, lock_since, blocked_by).
+
+Jobs that write attendance without a document of their own (the nightly
+generation and reconciliation fixes) take a scope lock kept in redis and
+skip their work when it overlaps; generator runs queue behind them.
+"""
+
+from contextlib import contextmanager
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, getdate, now_datetime
+
+from compliance.dashboard import refresh_run_counts
+
+# Serialises scheduling decisions across workers (MariaDB named lock)
+SCHEDULER_LOCK = "compliance_generation_scheduler"
+SCHEDULER_LOCK_TIMEOUT = 30
+# Held locks older than the generation job timeout plus a margin belong to dead workers
+STALE_LOCK_SECONDS = 3600 + 600
+
+# Redis key of the scope locks held by jobs without a document
+SCOPE_LOCKS_KEY = "compliance_scope_locks"
+
+GENERATION_JOB = "compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator.generate_attendance_background"
+
+
+@contextmanager
+def _scheduler_lock():
+	if not frappe.db.sql("SELECT GET_LOCK(%s, %s)", (SCHEDULER_LOCK, SCHEDULER_LOCK_TIMEOUT))[0][0]:
+		frappe.throw(_("Another generation run is being scheduled, please try again"))
+	try:
+		yield
+	finally:
+		frappe.db.sql("SELECT RELEASE_LOCK(%s)", SCHEDULER_LOCK)
+
+
+def generator_scope(doc):
+	return frappe._dict(
+		company=doc.company,
+		department=doc.department or None,
+		from_date=getdate(doc.start_date),
+		to_date=getdate(doc.end_date),
+	)
+
+
+def get_conflicts(scope, exclude=None, queued_before=None):
+	"""
+	Return the runs that block `scope`.
+
+	These are held locks with an overlapping scope and, when `queued_before`
+	is given, overlapping generator runs that were queued earlier. A missing
+	company or department means the whole company or all companies.
+	"""
+	values = dict(scope, exclude=exclude or "", queued_before=queued_before)
+	queued_condition = "OR (lock_status = 'Queued' AND lock_since < %(queued_before)s)" if queued_before else ""
+
+	generator_runs = frappe.db.sql_list(
+		f"""
+		SELECT name FROM `tabFake Attendance Generator`
+		WHERE name != %(exclude)s
+			AND (lock_status = 'Held' {queued_condition})
+			AND start_date <= %(to_date)s AND end_date >= %(from_date)s
+			AND (%(company)s IS NULL OR company = %(company)s)
+			AND (%(department)s IS NULL OR IFNULL(department, '') IN ('', %(department)s))
+		ORDER BY lock_since
+		""",
+		values,
+	)
+	# Compliance Attendance Generate has no company/department, so any date overlap blocks
+	attendance_runs = frappe.db.sql_list(
+		"""
+		SELECT name FROM `tabCompliance Attendance Generate`
+		WHERE name != %(exclude)s
+			AND lock_status = 'Held'
+			AND from_date <= %(to_date)s AND to_date >= %(from_date)s
+		""",
+		values,
+	)
+
+	scope_locks = [name for name, lock in _get_scope_locks().items() if _scopes_overlap(scope, lock.scope)]
+
+	return generator_runs + attendance_runs + scope_locks
+
+
+def _scopes_overlap(scope, other):
+	# A missing company or department covers every company or department
+	return (
+		scope.from_date <= other.to_date
+		and scope.to_date >= other.from_date
+		and (not scope.company or not other.company or scope.company == other.company)
+		and (not scope.department or not other.department or scope.department == other.department)
+	)
+
+
+def acquire_scope_lock(name, company, department, from_date, to_date):
+	"""
+	Take a scope lock for a job without a document, unless it overlaps a held lock.
+
+	Args:
+		name (str): lock name, shown to runs that are blocked by it
+
+	Returns:
+		list: names of the blocking runs; empty when the lock was taken
+	"""
+	scope = frappe._dict(
+		company=company or None, department=department or None, from_date=getdate(from_date), to_date=getdate(to_date)
+	)
+	with _scheduler_lock():
+		_release_stale_locks()
+		conflicts = get_conflicts(scope)
+		if not conflicts:
+			locks = _get_scope_locks()
+			locks[name] = frappe._dict(scope=scope, since=now_datetime())
+			frappe.cache().set_value(SCOPE_LOCKS_KEY, locks)
+			frappe.db.commit()
+
+	return conflicts
+
+
+def release_scope_lock(name):
+	"""Release a job's scope lock and start any queued runs it was blocking"""
+	with _scheduler_lock():
+		locks = _get_scope_locks()
+		locks.pop(name, None)
+		frappe.cache().set_value(SCOPE_LOCKS_KEY, locks)
+	start_queued_runs()
+
+
+def _get_scope_locks():
+	return frappe.cache().get_value(SCOPE_LOCKS_KEY) or {}
+
+
+def schedule_generation(doc):
+	"""
+	Start a Fake Attendance Generator run now, or queue it behind overlapping runs.
+
+	Returns:
+		list: names of the blocking runs; empty when the run was started
+	"""
+	with _scheduler_lock():
+		_release_stale_locks()
+		if frappe.db.get_value("Fake Attendance Generator", doc.name, "lock_status") == "Held":
+			# Its previous job is still writing, e.g. after a cancel it has not picked up yet
+			frappe.throw(_("The previous run of {0} is still stopping, please try again shortly").format(doc.name))
+		conflicts = get_conflicts(generator_scope(doc), exclude=doc.name, queued_before=now_datetime())
+
+		if conflicts:
+			_set_lock("Fake Attendance Generator", doc.name, "Queued", status="Queued", blocked_by=", ".join(conflicts))
+		else:
+			_start_generation(doc.name)
+
+		frappe.db.commit()
+
+	refresh_run_counts()
+	return conflicts
+
+
+def acquire_attendance_lock(doc):
+	"""Take the lock for a synchronous Compliance Attendance Generate run, or throw if it overlaps"""
+	scope = frappe._dict(company=None, department=None, from_date=getdate(doc.from_date), to_date=getdate(doc.to_date))
+
+	with _scheduler_lock():
+		_release_stale_locks()
+		conflicts = get_conflicts(scope, exclude=doc.name)
+		if conflicts:
+			frappe.throw(
+				_("Attendance is being generated for an overlapping scope by {0}. Please try again when it finishes.").format(
+					", ".join(conflicts)
+				)
+			)
+
+		_set_lock("Compliance Attendance Generate", doc.name, "Held")
+		frappe.db.commit()
+
+
+def release_lock(doctype, name):
+	"""Release a run's lock and start any queued runs it was blocking"""
+	values = {"blocked_by": ""} if doctype == "Fake Attendance Generator" else {}
+	_set_lock(doctype, name, "Released", **values)
+	frappe.db.commit()
+	start_queued_runs()
+	if doctype == "Fake Attendance Generator":
+		# Workspace run counts include this run, e.g. when it was cancelled while queued
+		refresh_run_counts()
+
+
+def start_queued_runs():
+	"""Start queued generator runs that no longer overlap a held lock (also run by the scheduler)"""
+	with _scheduler_lock():
+		released = _release_stale_locks()
+		queued = frappe.get_all(
+			"Fake Attendance Generator",
+			filters={"lock_status": "Queued"},
+			fields=["name", "company", "department", "start_date", "end_date", "lock_since", "blocked_by"],
+			order_by="lock_since asc",
+		)
+
+		for run in queued:
+			conflicts = get_conflicts(generator_scope(run), exclude=run.name, queued_before=run.lock_since)
+			if not conflicts:
+				_start_generation(run.name)
+			elif ", ".join(conflicts) != run.blocked_by:
+				frappe.db.set_value(
+					"Fake Attendance Generator", run.name, "blocked_by", ", ".join(conflicts), update_modified=False
+				)
+
+		frappe.db.commit()
+
+	if queued or released:
+		refresh_run_counts()
+
+
+def _start_generation(name):
+	_set_lock("Fake Attendance Generator", name, "Held", status="In Progress", blocked_by="")
+	frappe.enqueue(
+		method=GENERATION_JOB,
+		doc_name=name,
+		queue="long",
+		timeout=3600,  # 1 hour timeout
+		job_name=f"Generate Fake Attendance - {name}",
+		enqueue_after_commit=True,
+	)
+
+
+def _set_lock(doctype, name, lock_status, **values):
+	# update_modified=False so a running job's own doc.save() does not hit TimestampMismatch
+	frappe.db.set_value(
+		doctype, name, dict(values, lock_status=lock_status, lock_since=now_datetime()), update_modified=False
+	)
+
+
+def _release_stale_locks():
+	"""Release expired locks; returns the number released"""
+	cutoff = add_to_date(now_datetime(), seconds=-STALE_LOCK_SECONDS)
+	released = 0
+	for doctype in ("Fake Attendance Generator", "Compliance Attendance Generate"):
+		for name in frappe.get_all(
+			doctype, filters={"lock_status": "Held", "lock_since": ["<", cutoff]}, pluck="name"
+		):
+			values = {"status": "Failed", "generation_log": "Run lock expired"} if doctype == "Fake Attendance Generator" else {}
+			_set_lock(doctype, name, "Released", **values)
+			released += 1
+
+	locks = _get_scope_locks()
+	stale = [name for name, lock in locks.items() if lock.since < cutoff]
+	if stale:
+		for name in stale:
+			del locks[name]
+		frappe.cache().set_value(SCOPE_LOCKS_KEY, locks)
+		released += len(stale)
+
+	return released
@@ -0,0 +1,103 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Per-run metrics for attendance generation, stored as Attendance Generation Run.
+
+Query and commit counts are deltas of the worker connection's session
+status counters, so they cover everything the run did on that connection.
+"""
+
+import os
+import socket
+from contextlib import contextmanager
+from time import perf_counter
+
+import frappe
+from frappe.utils import flt, getdate, now_datetime
+
+import compliance
+
+SESSION_COUNTERS = ("Questions", "Com_commit")
+
+
+class RunMetrics:
+	"""Collects the timings and counters of one generation run"""
+
+	def __init__(self, source, settings, employees, generator=None):
+		self.source = source
+		self.generator = generator
+		self.settings = settings
+		self.employees = employees
+		self.started_at = now_datetime()
+		self.started = perf_counter()
+		self.phase_seconds = {}
+		self.rows = {}
+		self.errors = 0
+		self.counters = _session_counters()
+
+	@contextmanager
+	def phase(self, name):
+		started = perf_counter()
+		try:
+			yield
+		finally:
+			self.phase_seconds[name] = self.phase_seconds.get(name, 0) + perf_counter() - started
+
+	def add_rows(self, phase, count):
+		self.rows[phase] = self.rows.get(phase, 0) + (count or 0)
+
+	def save(self, status, batcher=None, error=None):
+		"""Insert the Attendance Generation Run and commit; never raises, metrics must not fail a run"""
+		frappe.db.savepoint("run_metrics")
+		try:
+			counters = _session_counters()
+			from_date, to_date = getdate(self.settings.start_date), getdate(self.settings.end_date)
+			frappe.get_doc(
+				{
+					"doctype": "Attendance Generation Run",
+					"source": self.source,
+					"generator": self.generator,
+					"status": status,
+					"company": self.settings.company,
+					"department": self.settings.department,
+					"from_date": from_date,
+					"to_date": to_date,
+					"employees": self.employees,
+					"days": (to_date - from_date).days + 1,
+					"worker_host": f"{socket.gethostname()}:{os.getpid()}",
+					"app_version": compliance.__version__,
+					"started_at": self.started_at,
+					"finished_at": now_datetime(),
+					"duration": perf_counter() - self.started,
+					**self._phase_fields("attendance", "attendance_rows", "attendance_rows_per_second"),
+					**self._phase_fields("leave", "leave_applications", "leave_applications_per_second"),
+					"query_count": counters.get("Questions", 0) - self.counters.get("Questions", 0),
+					"commit_count": counters.get("Com_commit", 0) - self.counters.get("Com_commit", 0),
+					"error_count": self.errors,
+					"batch_summary": batcher.summary() if batcher else None,
+					"error": error,
+				}
+			).insert(ignore_permissions=True)
+			frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback(save_point="run_metrics")
+			frappe.log_error(f"Could not save generation run metrics: {str(e)}"[:140], "Attendance Generation Run")
+
+	def _phase_fields(self, phase, rows_field, rate_field):
+		seconds = self.phase_seconds.get(phase, 0)
+		rows = self.rows.get(phase, 0)
+		return {
+			f"{phase}_seconds": seconds,
+			rows_field: rows,
+			rate_field: flt(rows / seconds, 2) if seconds else 0,
+		}
+
+
+def _session_counters():
+	return {
+		name: int(value)
+		for name, value in frappe.db.sql(
+			"SHOW SESSION STATUS WHERE Variable_name IN %(names)s", {"names": SESSION_COUNTERS}
+		)
+	}
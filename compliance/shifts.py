@@ -0,0 +1,131 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Shift Type timings and Shift Assignments for the attendance generator.
+
+Shift Type timings are kept in a process cache for the life of the worker.
+Saving or deleting a Shift Type bumps a version in redis (doc_events), and
+every lookup compares it once, so edits are picked up by the next run.
+Shift Assignments are resolved for all employees of a run in one query.
+"""
+
+import frappe
+from frappe.utils import cint, get_time, getdate
+
+SHIFT_CACHE_VERSION_KEY = "compliance_shift_type_version"
+MINUTES_PER_DAY = 24 * 60
+
+# Shift Type name -> timings, see get_shift_timings
+_shift_type_cache = {}
+_shift_type_cache_version = None
+
+
+def get_shift_timings(shift_types):
+	"""
+	Return the timings of the given Shift Types, loading missing ones in one query.
+
+	Times are minutes from midnight of the shift date. The end of a shift
+	that crosses midnight is on the next day, so it is more than 1440.
+
+	Returns:
+		dict: Shift Type name -> frappe._dict(start, end, actual_start, actual_end,
+			late_grace, early_grace, cross_midnight); actual_start/actual_end
+			include the check-in/check-out allowance around the shift
+	"""
+	global _shift_type_cache_version
+
+	version = frappe.cache().get_value(SHIFT_CACHE_VERSION_KEY)
+	if version != _shift_type_cache_version:
+		_shift_type_cache.clear()
+		_shift_type_cache_version = version
+
+	missing = {name for name in shift_types if name and name not in _shift_type_cache}
+	if missing:
+		for shift in frappe.get_all(
+			"Shift Type",
+			filters={"name": ["in", list(missing)]},
+			fields=[
+				"name",
+				"start_time",
+				"end_time",
+				"begin_check_in_before_shift_start_time",
+				"allow_check_out_after_shift_end_time",
+				"enable_late_entry_marking",
+				"late_entry_grace_period",
+				"enable_early_exit_marking",
+				"early_exit_grace_period",
+			],
+		):
+			_shift_type_cache[shift.name] = _timings(shift)
+
+	return {name: _shift_type_cache[name] for name in shift_types if name in _shift_type_cache}
+
+
+def _timings(shift):
+	start = _minutes(shift.start_time)
+	end = _minutes(shift.end_time)
+	cross_midnight = end <= start
+	end = end + MINUTES_PER_DAY if cross_midnight else end
+	return frappe._dict(
+		start=start,
+		end=end,
+		actual_start=start - cint(shift.begin_check_in_before_shift_start_time),
+		actual_end=end + cint(shift.allow_check_out_after_shift_end_time),
+		late_grace=cint(shift.late_entry_grace_period) if shift.enable_late_entry_marking else None,
+		early_grace=cint(shift.early_exit_grace_period) if shift.enable_early_exit_marking else 0,
+		cross_midnight=cross_midnight,
+	)
+
+
+def _minutes(value):
+	value = get_time(value)
+	return value.hour * 60 + value.minute
+
+
+def clear_shift_type_cache(doc=None, method=None):
+	"""doc_events hook for Shift Type: invalidate the process caches of every worker"""
+	frappe.cache().set_value(SHIFT_CACHE_VERSION_KEY, frappe.generate_hash(length=10))
+
+
+def get_shift_assignments(employees, start_date, end_date):
+	"""
+	Fetch the active Shift Assignments overlapping a date range, in one query.
+
+	Returns:
+		dict: employee -> list of (start_date, end_date or None, shift_type), by start date
+	"""
+	assignments = {}
+	if not employees:
+		return assignments
+
+	rows = frappe.db.sql(
+		"""
+		SELECT employee, start_date, end_date, shift_type
+		FROM `tabShift Assignment`
+		WHERE docstatus = 1
+			AND status = 'Active'
+			AND employee IN %(employees)s
+			AND start_date <= %(end_date)s
+			AND (end_date IS NULL OR end_date >= %(start_date)s)
+		ORDER BY employee, start_date
+		""",
+		{"employees": employees, "start_date": start_date, "end_date": end_date},
+	)
+	for employee, assignment_start, assignment_end, shift_type in rows:
+		assignments.setdefault(employee, []).append(
+			(getdate(assignment_start), getdate(assignment_end) if assignment_end else None, shift_type)
+		)
+
+	return assignments
+
+
+def shift_for_day(assignments, day, default=None):
+	"""Shift Type of the latest assignment covering `day`, else `default`; no queries"""
+	shift_type = default
+	for assignment_start, assignment_end, assigned_shift in assignments:
+		if assignment_start > day:
+			break
+		if assignment_end is None or assignment_end >= day:
+			shift_type = assigned_shift
+	return shift_type
@@ -0,0 +1,219 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+"""
+Synthetic organisations for benchmarking the attendance generator.
+
+Everything is written with frappe.db.bulk_insert and deterministic names
+(`<prefix>-...`), so reruns with the same prefix skip existing rows and a
+10k employee site takes minutes instead of hours of Document inserts.
+Document hooks do not run; rows that other apps derive on submit, like the
+Leave Ledger Entries behind each Leave Allocation, are written alongside.
+"""
+
+import random
+from datetime import date
+
+import frappe
+from frappe.utils import add_days, now
+from frappe.utils.nestedset import rebuild_tree
+
+DEPARTMENT_NAMES = ["Stitching", "Cutting", "Finishing", "Packing", "Quality", "Maintenance", "Stores", "Admin"]
+FIRST_NAMES = ["Ali", "Ayesha", "Bilal", "Fatima", "Hamza", "Hina", "Imran", "Maryam", "Omar", "Sana", "Usman", "Zainab"]
+LAST_NAMES = ["Ahmed", "Butt", "Chaudhry", "Iqbal", "Khan", "Malik", "Qureshi", "Raza", "Shah", "Siddiqui"]
+
+INSERT_CHUNK_SIZE = 10_000
+
+
+def create_synthetic_organization(
+	company,
+	departments=10,
+	employees_per_department=100,
+	leave_type="Casual Leave",
+	leaves_per_employee=14,
+	year=None,
+	prefix="SYN",
+	seed=None,
+):
+	"""
+	Bulk-create departments, configs, a holiday list, employees and leave allocations.
+
+	Args:
+		company (str): existing Company to create the organisation in
+		departments (int): number of departments
+		employees_per_department (int): employees in each department
+		leave_type (str): Leave Type allocated to every employee, created if missing
+		leaves_per_employee (float): leaves allocated for the year
+		year (int): calendar year for the holiday list and allocations, defaults to the current year
+		prefix (str): prefix for every generated name
+		seed (int): random seed, for reproducible organisations
+
+	Returns:
+		dict: rows per doctype in the organisation (rows that already existed are skipped, not rewritten)
+	"""
+	rng = random.Random(seed)
+	year = year or date.today().year
+	abbr = frappe.get_cached_value("Company", company, "abbr")
+	standard = _standard_values()
+
+	holiday_list = _create_holiday_list(f"{prefix} {year}", year, standard)
+	_ensure_leave_type(leave_type)
+
+	department_names = [
+		f"{prefix} {DEPARTMENT_NAMES[i % len(DEPARTMENT_NAMES)]} {i + 1:03d} - {abbr}" for i in range(departments)
+	]
+	_bulk_insert(
+		"Department",
+		["department_name", "company", "parent_department", "is_group"],
+		[(name.rsplit(" - ", 1)[0], company, "All Departments", 0) for name in department_names],
+		department_names,
+		standard,
+	)
+	rebuild_tree("Department")
+
+	_bulk_insert(
+		"Department Attendance Config",
+		[
+			"department", "company", "is_active",
+			"late_arrival_probability", "absent_probability", "overtime_probability", "early_exit_probability",
+			"working_hours", "grace_period_minutes", "overtime_threshold_hours",
+			"check_in_start_time", "check_in_end_time", "check_out_start_time", "check_out_end_time",
+			"overtime_start_time", "overtime_end_time",
+		],
+		[
+			(
+				department, company, 1,
+				rng.randint(5, 20), rng.randint(2, 10), rng.randint(5, 25), rng.randint(3, 12),
+				8, 15, 8.5,
+				"08:00:00", "09:30:00", "17:00:00", "18:30:00",
+				"18:00:00", "22:00:00",
+			)
+			for department in department_names
+		],
+		[f"{prefix}-DAC-{i + 1:04d}" for i in range(departments)],
+		standard,
+	)
+
+	employees = []
+	for d, department in enumerate(department_names):
+		for e in range(employees_per_department):
+			number = d * employees_per_department + e + 1
+			first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+			employees.append(
+				(
+					f"{prefix}-EMP-{number:06d}",
+					first_name,
+					last_name,
+					f"{first_name} {last_name}",
+					rng.choice(["Male", "Female"]),
+					date(year - rng.randint(20, 55), rng.randint(1, 12), rng.randint(1, 28)),
+					date(year - rng.randint(0, 10), rng.randint(1, 12), rng.randint(1, 28)),
+					company,
+					department,
+					holiday_list,
+					f"{number}",
+					"Active",
+				)
+			)
+	employee_names = [row[0] for row in employees]
+	_bulk_insert(
+		"Employee",
+		[
+			"employee", "first_name", "last_name", "employee_name", "gender", "date_of_birth", "date_of_joining",
+			"company", "department", "holiday_list", "biometric_id", "status",
+		],
+		employees,
+		employee_names,
+		standard,
+	)
+	rebuild_tree("Employee")
+
+	from_date, to_date = date(year, 1, 1), date(year, 12, 31)
+	allocation_names = [f"{prefix}-LA-{year}-{i + 1:06d}" for i in range(len(employees))]
+	_bulk_insert(
+		"Leave Allocation",
+		[
+			"employee", "employee_name", "department", "company", "leave_type",
+			"from_date", "to_date", "new_leaves_allocated", "total_leaves_allocated",
+		],
+		[
+			(emp[0], emp[3], emp[8], company, leave_type, from_date, to_date, leaves_per_employee, leaves_per_employee)
+			for emp in employees
+		],
+		allocation_names,
+		standard,
+		docstatus=1,
+	)
+	# What Leave Allocation.on_submit would have written, HRMS computes balances from it
+	_bulk_insert(
+		"Leave Ledger Entry",
+		[
+			"employee", "employee_name", "leave_type", "transaction_type", "transaction_name",
+			"leaves", "from_date", "to_date", "company", "is_carry_forward", "is_expired", "is_lwp",
+		],
+		[
+			(emp[0], emp[3], leave_type, "Leave Allocation", allocation, leaves_per_employee, from_date, to_date, company, 0, 0, 0)
+			for emp, allocation in zip(employees, allocation_names)
+		],
+		[f"{prefix}-LLE-{year}-{i + 1:06d}" for i in range(len(employees))],
+		standard,
+		docstatus=1,
+	)
+
+	return {
+		"Department": departments,
+		"Department Attendance Config": departments,
+		"Employee": len(employees),
+		"Leave Allocation": len(employees),
+		"Holiday List": 1,
+	}
+
+
+def _standard_values():
+	timestamp = now()
+	return (frappe.session.user, timestamp, timestamp, frappe.session.user)
+
+
+def _bulk_insert(doctype, fields, rows, names, standard, docstatus=0):
+	frappe.db.bulk_insert(
+		doctype,
+		["name", "owner", "creation", "modified", "modified_by", "docstatus", *fields],
+		[(name, *standard, docstatus, *row) for name, row in zip(names, rows)],
+		ignore_duplicates=True,
+		chunk_size=INSERT_CHUNK_SIZE,
+	)
+
+
+def _create_holiday_list(name, year, standard):
+	"""Holiday list for the year with every Saturday and Sunday as a weekly off"""
+	from_date, to_date = date(year, 1, 1), date(year, 12, 31)
+	weekends = []
+	day = from_date
+	while day <= to_date:
+		if day.weekday() >= 5:
+			weekends.append(day)
+		day = add_days(day, 1)
+
+	_bulk_insert(
+		"Holiday List",
+		["holiday_list_name", "from_date", "to_date", "total_holidays"],
+		[(name, from_date, to_date, len(weekends))],
+		[name],
+		standard,
+	)
+	frappe.db.bulk_insert(
+		"Holiday",
+		["name", "owner", "creation", "modified", "modified_by", "parent", "parenttype", "parentfield", "idx",
+			"holiday_date", "description", "weekly_off"],
+		[
+			(f"{name}-{i + 1:03d}", *standard, name, "Holiday List", "holidays", i + 1, day, day.strftime("%A"), 1)
+			for i, day in enumerate(weekends)
+		],
+		ignore_duplicates=True,
+	)
+	return name
+
+
+def _ensure_leave_type(leave_type):
+	if not frappe.db.exists("Leave Type", leave_type):
+		frappe.get_doc({"doctype": "Leave Type", "leave_type_name": leave_type, "max_leaves_allowed": 30}).insert()
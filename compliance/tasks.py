@@ -0,0 +1,124 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import add_days, getdate
+
+from compliance.compliance.doctype.fake_attendance_generator.fake_attendance_generator import (
+	DEPT_CONFIG_FIELDS,
+	EMPLOYEE_FIELDS,
+	_get_covered_days,
+	_run_generation_pipeline,
+	log_message,
+)
+from compliance.compliance.report.compliance_attendance_summary.compliance_attendance_summary import (
+	clear_summary_cache,
+)
+from compliance.dashboard import refresh_workspace_stats
+from compliance.run_locks import acquire_scope_lock, release_scope_lock
+from compliance.run_metrics import RunMetrics
+
+# Upper bound on the days one nightly run will catch up after downtime
+MAX_CATCH_UP_DAYS = 31
+
+
+def generate_daily_attendance():
+	"""
+	Incremental nightly generation (scheduler_events: daily_long).
+
+	For every active Department Attendance Config with daily generation
+	enabled, generate the days between its `last_generated_date` watermark
+	and yesterday, for active employees that have no Attendance Logs yet on
+	those days. On a healthy schedule that is exactly one day of rows.
+	A config whose scope overlaps a running generation is skipped and its
+	watermark left as is, so the next night catches it up; so is the
+	watermark of a config where any employee failed.
+	"""
+	configs = frappe.get_all(
+		"Department Attendance Config",
+		filters={"is_active": 1, "enable_daily_generation": 1},
+		fields=["name", "company", "last_generated_date", *DEPT_CONFIG_FIELDS],
+	)
+
+	for cfg in configs:
+		try:
+			_generate_for_config(cfg)
+			frappe.db.commit()
+		except Exception as e:
+			log_message(f"❌ Daily generation failed for {cfg.department}: {str(e)}", "error", show_user=False)
+			frappe.db.rollback()
+
+	if configs:
+		refresh_workspace_stats()
+
+
+def _generate_for_config(cfg):
+	end_date = add_days(getdate(), -1)
+	if cfg.last_generated_date:
+		start_date = max(add_days(getdate(cfg.last_generated_date), 1), add_days(end_date, 1 - MAX_CATCH_UP_DAYS))
+	else:
+		# First run only generates the latest day, older gaps are a manual backfill
+		start_date = end_date
+
+	if start_date > end_date:
+		return
+
+	lock_name = f"Daily Generation - {cfg.department}"
+	conflicts = acquire_scope_lock(lock_name, cfg.company, cfg.department, start_date, end_date)
+	if conflicts:
+		log_message(
+			f"⏭️ Daily generation for {cfg.department} skipped, blocked by {', '.join(conflicts)}",
+			"info",
+			show_user=False,
+		)
+		return
+
+	try:
+		_generate_days(cfg, start_date, end_date)
+	except Exception:
+		frappe.db.rollback()
+		raise
+	finally:
+		release_scope_lock(lock_name)
+
+
+def _generate_days(cfg, start_date, end_date):
+	employees = frappe.get_all(
+		"Employee",
+		filters={
+			"status": "Active",
+			"company": cfg.company,
+			"department": cfg.department,
+			"date_of_joining": ["<=", end_date],
+		},
+		fields=EMPLOYEE_FIELDS,
+	)
+
+	if employees:
+		settings = frappe._dict(
+			{
+				"company": cfg.company,
+				"department": cfg.department,
+				"start_date": start_date,
+				"end_date": end_date,
+				"include_weekends": 0,
+				"generate_overtime": 1,
+			}
+		)
+		covered_days = _get_covered_days([emp.name for emp in employees], start_date, end_date)
+		metrics = RunMetrics("Daily Generation", settings, len(employees))
+		total_created, processed = _run_generation_pipeline(
+			settings, employees, {cfg.department: cfg}, covered_days=covered_days, metrics=metrics
+		)
+		log_message(
+			f"📅 Daily generation for {cfg.department}: {total_created} records for {processed} employees ({start_date} to {end_date})",
+			"info",
+			show_user=False,
+		)
+
+	# After failures the watermark stays put, the covered-days mask retries only the missing days
+	if not employees or not metrics.errors:
+		frappe.db.set_value("Department Attendance Config", cfg.name, "last_generated_date", end_date)
+	clear_summary_cache(cfg.company)
+	if employees:
+		metrics.save("Completed")
@@ -0,0 +1,147 @@
+# Copyright (c) 2025, Compliance and contributors
+# For license information, please see license.txt
+
+import random
+import time
+
+import frappe
+from frappe.utils import cint
+
+# Limits and target for AdaptiveBatchSize
+DEFAULT_BATCH_SIZE = 50
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 2000
+TARGET_STATEMENT_SECONDS = 0.25
+
+# Backoff for deadlock / lock wait timeout retries
+WRITE_RETRIES = 4
+RETRY_BASE_DELAY = 0.5
+
+
+def get_child_doctype(parent, fieldname):
+	"""Return the child doctype behind a Table field, or None if the parent is not installed"""
+	if not frappe.db.table_exists(parent):
+		return None
+
+	field = frappe.get_meta(parent).get_field(fieldname)
+	return field.options if field else None
+
+
+def get_daily_attendance_doctype():
+	"""Child doctype of Employee Attendance `table1`, which is owned by another app"""
+	return get_child_doctype("Employee Attendance", "table1")
+
+
+def get_standard_values():
+	"""Owner/timestamp columns for rows written without going through a Document"""
+	now = frappe.utils.now()
+	return {"owner": frappe.session.user, "creation": now, "modified": now, "modified_by": frappe.session.user}
+
+
+class AdaptiveBatchSize:
+	"""
+	Chunk size for bulk writes, tuned from measured statement latency.
+
+	Each statement's latency is scaled to a full chunk by its per-row
+	cost, so the per-employee statements, which are usually shorter than
+	the size, still feed back. The size grows by a quarter while a full
+	chunk would finish well under the target latency. It scales down in
+	proportion when it would run slow, and it halves on every deadlock or
+	lock wait retry. The limits keep it between MIN_BATCH_SIZE and
+	MAX_BATCH_SIZE.
+	"""
+
+	def __init__(self, initial=DEFAULT_BATCH_SIZE, minimum=MIN_BATCH_SIZE, maximum=MAX_BATCH_SIZE, target_seconds=TARGET_STATEMENT_SECONDS):
+		self.minimum = minimum
+		self.maximum = maximum
+		self.target_seconds = target_seconds
+		self.size = min(max(cint(initial) or DEFAULT_BATCH_SIZE, minimum), maximum)
+		self.initial = self.smallest = self.largest = self.size
+		self.statements = 0
+		self.retries = 0
+
+	def record(self, rows, seconds):
+		"""Feed back one statement's row count and duration"""
+		self.statements += 1
+		if rows < self.minimum:
+			# Fixed statement overhead dominates tiny chunks
+			return
+
+		seconds = seconds * self.size / rows
+		if seconds > self.target_seconds:
+			self._resize(self.size * self.target_seconds / seconds)
+		elif seconds < self.target_seconds / 2:
+			self._resize(self.size * 1.25 + 1)
+
+	def record_retry(self):
+		"""Back off after a deadlock or lock wait timeout"""
+		self.retries += 1
+		self._resize(self.size / 2)
+
+	def _resize(self, size):
+		self.size = int(min(max(size, self.minimum), self.maximum))
+		self.smallest = min(self.smallest, self.size)
+		self.largest = max(self.largest, self.size)
+
+	def summary(self):
+		return (
+			f"batch size {self.initial} → {self.size} (range {self.smallest}-{self.largest}), "
+			f"{self.statements} statements, {self.retries} lock retries"
+		)
+
+
+def is_retryable_write_error(e):
+	"""True for deadlocks and lock wait timeouts, after which the transaction can be retried"""
+	return frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e)
+
+
+def retry_delay(attempt):
+	"""Exponential backoff with jitter for the given retry attempt (0-based)"""
+	delay = RETRY_BASE_DELAY * (2**attempt)
+	return delay + random.uniform(0, delay)
+
+
+def bulk_upsert(doctype, fields, rows, update_fields, chunk_size=500, batcher=None):
+	"""
+	Write rows with multi-row INSERT ... ON DUPLICATE KEY UPDATE.
+
+	Rows are matched on the table's primary and unique keys, so writing
+	the same name or natural key twice updates `update_fields` instead of
+	duplicating it.
+	Document hooks and validations do not run.
+
+	Args:
+		doctype (str): target doctype
+		fields (list): column names, in the order of each row tuple
+		rows (list[tuple]): values to write
+		update_fields (list): columns refreshed when the key already exists
+		chunk_size (int): rows per statement
+		batcher (AdaptiveBatchSize): when given, sets the rows per statement and
+			is fed each statement's latency instead of using chunk_size
+
+	Returns:
+		int: number of rows written
+	"""
+	if not rows:
+		return 0
+
+	columns = ", ".join(f"`{field}`" for field in fields)
+	updates = ", ".join(f"`{field}` = VALUES(`{field}`)" for field in update_fields)
+	row_placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+	start = 0
+	while start < len(rows):
+		size = batcher.size if batcher else chunk_size
+		chunk = rows[start : start + size]
+		started = time.monotonic()
+		frappe.db.sql(
+			f"""INSERT INTO `tab{doctype}` ({columns})
+			VALUES {", ".join([row_placeholder] * len(chunk))}
+			ON DUPLICATE KEY UPDATE {updates}""",
+			[value for row in chunk for value in row],
+		)
+		if batcher:
+			batcher.record(len(chunk), time.monotonic() - started)
+		start += len(chunk)
+
+	return len(rows)